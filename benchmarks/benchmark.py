@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Runs the public API against the local broker emulator and reports throughput and latency.
+
+Usage:
+    python benchmarks/benchmark.py [--latency 0.02] [--board-size 100] [--options-size 1000]
+        [--iterations 50] [--workers 8] [--scenario history ...]
+"""
+
+from pyhomebroker import HomeBroker
+from pyhomebroker.emulator import BrokerEmulator
+
+from concurrent.futures import ThreadPoolExecutor
+
+import argparse
+import datetime
+import time
+
+import numpy as np
+
+def run_scenario(name, fn, iterations, workers):
+
+    latencies = []
+
+    def timed(index):
+        start = time.perf_counter()
+        fn(index)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(timed, range(iterations)))
+    else:
+        for index in range(iterations):
+            timed(index)
+
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+
+    print('{:<28} {:>6} {:>9.2f} {:>9.1f} {:>9.1f} {:>9.1f} {:>9.1f}'.format(
+        name, iterations, elapsed, iterations / elapsed,
+        np.percentile(latencies, 50), np.percentile(latencies, 95), np.percentile(latencies, 99)))
+
+def get_scenarios(hb, args):
+
+    symbols = ['SYM{}'.format(index) for index in range(args.iterations)]
+    from_date = datetime.date(2015, 1, 1)
+    to_date = datetime.date(2020, 1, 1)
+    intraday_date = datetime.date(2020, 1, 6)
+
+    scenarios = {
+        'login': (lambda i: hb.auth.login(1, 'user{}'.format(i), 'password', raise_exception=True), 1),
+        'securities': (lambda i: hb.online._scrapping.get_securities('accionesLideres', '2'), 1),
+        'options': (lambda i: hb.online._scrapping.get_options(), 1),
+        'order_book': (lambda i: hb.online._scrapping.get_order_book(symbols[i], '2'), 1),
+        'market_snapshot': (lambda i: hb.online.get_market_snapshot(), 1),
+        'history': (lambda i: hb.history.get_daily_history(symbols[i], from_date, to_date), 1),
+        'history_concurrent': (lambda i: hb.history.get_daily_history(symbols[i], from_date, to_date), args.workers),
+        'intraday': (lambda i: hb.history.get_intraday_history(symbols[i], intraday_date), 1),
+        'intraday_concurrent': (lambda i: hb.history.get_intraday_history(symbols[i], intraday_date), args.workers),
+        'orders_status': (lambda i: hb.orders.get_orders_status('1000'), 1),
+        'send_order': (lambda i: hb.orders.send_buy_order(symbols[i], '24hs', 100.5, 10), 1)
+    }
+
+    return {name: scenario for name, scenario in scenarios.items() if not args.scenario or name in args.scenario}
+
+def main():
+
+    parser = argparse.ArgumentParser(description='pyhomebroker benchmarks against the local broker emulator')
+    parser.add_argument('--latency', type=float, default=0.02, help='Seconds added to every response')
+    parser.add_argument('--board-size', type=int, default=100, help='Securities by board and settlement')
+    parser.add_argument('--options-size', type=int, default=1000, help='Options in the options board')
+    parser.add_argument('--iterations', type=int, default=50, help='Calls by scenario')
+    parser.add_argument('--workers', type=int, default=8, help='Threads used by the concurrent scenarios')
+    parser.add_argument('--scenario', action='append', help='Scenario to run (all by default)')
+    args = parser.parse_args()
+
+    emulator = BrokerEmulator(
+        latency=args.latency,
+        board_size=args.board_size,
+        options_size=args.options_size)
+
+    with emulator:
+        hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1', pool_size=max(args.workers, 2))
+        hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+        print('{:<28} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9}'.format('scenario', 'calls', 'seconds', 'calls/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+
+        for name, (fn, workers) in get_scenarios(hb, args).items():
+            run_scenario(name, fn, args.iterations, workers)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Compares convert_to_numeric_columns with the previous per-cell implementation on an options board.
+
+Usage:
+    python benchmarks/convert_numeric.py [--rows 1000] [--iterations 50]
+"""
+
+from pyhomebroker.common import convert_to_numeric_columns
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+columns = ['last', 'close', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_size', 'bid', 'ask_size', 'ask', 'previous_close', 'strike']
+
+def convert_to_numeric_columns_apply(df, columns):
+
+    for col in columns:
+        df[col] = df[col].apply(lambda x: x.replace('.', '').replace(',','.') if isinstance(x, str) else x)
+        df[col] = pd.to_numeric(df[col].apply(lambda x: np.nan if x == '-' else x))
+
+    return df
+
+def create_board(rows, seed=0):
+
+    rng = np.random.default_rng(seed)
+    data = {}
+
+    for index, col in enumerate(columns):
+        values = rng.random(rows) * 10 ** rng.integers(1, 7, rows)
+        text = ['{:,.2f}'.format(value).replace(',', 'X').replace('.', ',').replace('X', '.') for value in values]
+
+        # A third of the columns are numeric (as the json documents), the others are text with missing values
+        if index % 3 == 0:
+            data[col] = values
+        else:
+            data[col] = ['-' if missing else value for value, missing in zip(text, rng.random(rows) < 0.1)]
+
+    return pd.DataFrame(data)
+
+def measure(fn, board, iterations):
+
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        result = fn(board.copy(), columns)
+
+    return (time.perf_counter() - start) / iterations * 1000, result
+
+def main():
+
+    parser = argparse.ArgumentParser(description='convert_to_numeric_columns benchmark')
+    parser.add_argument('--rows', type=int, default=1000, help='Rows of the board')
+    parser.add_argument('--iterations', type=int, default=50, help='Conversions by implementation')
+    args = parser.parse_args()
+
+    board = create_board(args.rows)
+
+    apply_ms, expected = measure(convert_to_numeric_columns_apply, board, args.iterations)
+    vectorized_ms, result = measure(convert_to_numeric_columns, board, args.iterations)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+    print('{:<12} {:>10}'.format('version', 'ms/board'))
+    print('{:<12} {:>10.2f}'.format('apply', apply_ms))
+    print('{:<12} {:>10.2f}'.format('vectorized', vectorized_ms))
+    print('speedup {:.1f}x'.format(apply_ms / vectorized_ms))
+
+if __name__ == '__main__':
+    main()
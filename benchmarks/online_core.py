@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Compares OnlineCore.process_options with the previous per-row field mapping and date parsing
+on options boards of different sizes (the SignalR worker processes small batches).
+
+Usage:
+    python benchmarks/online_core.py [--sizes 1 10 100 3000] [--iterations 50]
+"""
+
+from pyhomebroker.common import convert_to_numeric_columns
+from pyhomebroker.online.online_core import OnlineCore
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+filter_columns = ['Symbol', 'BuyQuantity', 'BuyPrice', 'SellPrice', 'SellQuantity', 'LastPrice', 'VariationRate', 'StartPrice', 'MaxPrice', 'MinPrice', 'PreviousClose', 'TotalAmountTraded', 'TotalQuantityTraded', 'Trades', 'TradeDate', 'MaturityDate', 'StrikePrice', 'PutOrCall', 'Issuer', 'ClosePrice']
+options_columns = ['symbol', 'bid_size', 'bid', 'ask', 'ask_size', 'last', 'change', 'open', 'high', 'low', 'previous_close', 'turnover', 'volume', 'operations', 'datetime', 'expiration', 'strike', 'kind', 'underlying_asset', 'close']
+numeric_columns = ['last', 'close', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_size', 'bid', 'ask_size', 'ask', 'previous_close', 'strike']
+call_put_map = {0: '', 1: 'CALL', 2: 'PUT'}
+
+def process_options_apply(df):
+
+    df.TradeDate = pd.to_datetime(df.TradeDate, format='%Y%m%d', errors='coerce') + pd.to_timedelta(df.Hour, errors='coerce')
+    df.MaturityDate = pd.to_datetime(df.MaturityDate, format='%Y%m%d', errors='coerce')
+    df.PutOrCall = df.PutOrCall.apply(lambda x: call_put_map[x] if x in call_put_map else call_put_map[0])
+
+    df = df[filter_columns].copy()
+    df.columns = options_columns
+
+    df = convert_to_numeric_columns(df, numeric_columns)
+    df = df[df.strike > 0].copy()
+
+    return df.set_index(['symbol'])
+
+def create_board(rows, seed=0):
+
+    rng = np.random.default_rng(seed)
+    prices = rng.random(rows) * 1000
+    seconds = np.sort(rng.integers(11 * 3600, 17 * 3600, rows))
+
+    return pd.DataFrame({
+        'Symbol': ['GFGC{:05d}'.format(index) for index in range(rows)],
+        'BuyQuantity': rng.integers(1, 10000, rows),
+        'BuyPrice': prices * 0.99,
+        'SellPrice': prices * 1.01,
+        'SellQuantity': rng.integers(1, 10000, rows),
+        'LastPrice': prices,
+        'VariationRate': rng.random(rows) * 10 - 5,
+        'StartPrice': prices,
+        'MaxPrice': prices * 1.03,
+        'MinPrice': prices * 0.97,
+        'PreviousClose': prices,
+        'TotalAmountTraded': prices * 100,
+        'TotalQuantityTraded': rng.integers(1, 10000, rows),
+        'Trades': rng.integers(1, 1000, rows),
+        'TradeDate': '20201016',
+        'Hour': ['{:02d}:{:02d}:{:02d}'.format(value // 3600, value // 60 % 60, value % 60) for value in seconds],
+        'MaturityDate': rng.choice(['20201016', '20201218', '20210219'], rows),
+        'StrikePrice': rng.integers(1, 200, rows),
+        'PutOrCall': rng.integers(1, 3, rows),
+        'Issuer': 'GFGC',
+        'ClosePrice': '-'})
+
+def measure(fn, board, iterations):
+
+    start = time.perf_counter()
+
+    for _ in range(iterations):
+        result = fn(board.copy())
+
+    return (time.perf_counter() - start) / iterations * 1000, result
+
+def main():
+
+    parser = argparse.ArgumentParser(description='OnlineCore options processing benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 3000], help='Rows of the boards')
+    parser.add_argument('--iterations', type=int, default=50, help='Processed boards by implementation and size')
+    args = parser.parse_args()
+
+    core = OnlineCore()
+
+    print('{:>8} {:>12} {:>12} {:>8}'.format('rows', 'apply ms', 'vector ms', 'speedup'))
+
+    for rows in args.sizes:
+        board = create_board(rows)
+
+        apply_ms, expected = measure(process_options_apply, board, args.iterations)
+        vectorized_ms, result = measure(core.process_options, board, args.iterations)
+
+        pd.testing.assert_frame_equal(result, expected)
+
+        print('{:>8} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(rows, apply_ms, vectorized_ms, apply_ms / vectorized_ms))
+
+if __name__ == '__main__':
+    main()
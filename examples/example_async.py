@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import asyncio
+import datetime
+from pyhomebroker import AsyncHomeBroker
+
+broker = input('Numero de Agente: ')
+dni = input('DNI: ')
+user = input('Usuario: ')
+password = input('Clave: ')
+
+async def main():
+
+    async with AsyncHomeBroker(int(broker)) as hb:
+        await hb.auth.login(dni=dni, user=user, password=password, raise_exception=True)
+
+        snapshot, history = await asyncio.gather(
+            hb.online.get_market_snapshot(),
+            hb.history.get_daily_history('GGAL', datetime.date(2015, 1, 1), datetime.date(2020, 1, 1)))
+
+        print(snapshot['bluechips'])
+        print(history)
+
+asyncio.run(main())
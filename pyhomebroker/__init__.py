@@ -23,3 +23,8 @@ __version__ = '0.55'
 __author__ = 'Diego Degese'
 
 from .home_broker import HomeBroker
+from .home_broker_async import AsyncHomeBroker
+from .home_broker_pool import HomeBrokerPool
+from .common import SessionStore, RateLimiter, HedgePolicy, RequestScheduler, Metrics, MarketCalendar, set_json_decoder, to_structured_array
+from .history import HistoryCache, HistoryMemoryCache
+from .eod_download import EodDownload
@@ -21,5 +21,14 @@
 
 from .brokers import brokers
 from .user_agent import user_agent
-from .helpers import convert_to_numeric_columns
+from .helpers import convert_to_numeric_columns, compact_dataframe, to_structured_array, get_cookie_domain, get_public_ipaddress
+from .json_decoder import json_loads, set_json_decoder, get_json_decoder
+from .session_store import SessionStore
+from .deadline import Deadline, create_deadline
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .single_flight import SingleFlight
+from .hedge_policy import HedgePolicy
+from .metrics import Metrics
+from .market_calendar import MarketCalendar, market_calendar
+from .request_scheduler import RequestScheduler, PRIORITY_ORDERS, PRIORITY_ORDERS_STATUS, PRIORITY_MARKET_DATA, PRIORITY_HISTORY
 from .exceptions import SessionException, BrokerNotSupportedException, ServerException, DataException
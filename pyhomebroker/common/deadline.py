@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from threading import Lock
+
+import time
+
+class Deadline:
+
+    def __init__(self, seconds, requests=1):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        seconds : float
+            The number of seconds available to complete all the requests.
+        requests : int, optional
+            The number of requests expected to be issued before the deadline.
+            Each request receives an equal share of the remaining time, so a slow request cannot consume the
+            time of the following ones.
+        """
+
+        self.expires = time.monotonic() + seconds
+
+        self.__pending = max(requests, 1)
+        self.__lock = Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def remaining(self):
+        """
+        Returns the number of seconds until the deadline.
+        """
+
+        return max(self.expires - time.monotonic(), 0)
+
+    def is_expired(self):
+        """
+        Returns if the deadline is already reached.
+        """
+
+        return self.remaining() == 0
+
+    def set_requests(self, requests):
+        """
+        Updates the number of requests expected to be issued before the deadline.
+        Used when the number of requests is known after the first responses are received.
+        """
+
+        with self.__lock:
+            self.__pending = max(requests, 1)
+
+    def get_timeout(self):
+        """
+        Returns the number of seconds available for the next request and counts the request as issued.
+        """
+
+        with self.__lock:
+            timeout = self.remaining() / self.__pending
+            self.__pending = max(self.__pending - 1, 1)
+
+        return timeout
+
+def create_deadline(deadline, requests=1):
+    """
+    Returns the deadline object used to bound a group of requests.
+
+    Parameters
+    ----------
+    deadline : float or Deadline
+        The number of seconds available or a deadline already created by the caller (returned as is).
+    requests : int, optional
+        The number of requests expected to be issued before the deadline.
+
+    Returns
+    -------
+    A Deadline object or None if deadline is None.
+    """
+
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+
+    return Deadline(deadline, requests)
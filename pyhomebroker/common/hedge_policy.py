@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import deque
+from threading import Lock
+
+class HedgePolicy:
+
+    def __init__(self, percentile=95, max_extra_load=0.1, min_samples=20, window=200, min_delay=0.01):
+        """
+        Class constructor.
+
+        A read request is duplicated (hedged) when its response did not arrive after the given
+        percentile of the recent latencies of the same endpoint.  The first response received is used.
+
+        Parameters
+        ----------
+        percentile : float, optional
+            The percentile of the recent latencies waited before sending the duplicate request.
+        max_extra_load : float, optional
+            The maximum number of duplicate requests as a fraction of the requests sent. Ex. 0.1 = 10%
+        min_samples : int, optional
+            The number of latencies of an endpoint required before hedging its requests.
+        window : int, optional
+            The number of recent latencies kept by endpoint.
+        min_delay : float, optional
+            The minimum number of seconds waited before sending the duplicate request.
+        """
+
+        self.percentile = percentile
+        self.max_extra_load = max_extra_load
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+
+        self.__latencies = {}
+        self.__requests = 0
+        self.__hedged = 0
+        self.__wins = 0
+
+        self.__lock = Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get_delay(self, endpoint):
+        """
+        Registers a new request to the endpoint and returns the time to wait before hedging it.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint path. Ex. /Prices/GetByPanel
+
+        Returns
+        -------
+        The number of seconds to wait for the response before sending the duplicate request,
+        or None if there are not enough latencies to calculate it.
+        """
+
+        with self.__lock:
+            self.__requests += 1
+
+            latencies = self.__latencies.get(endpoint)
+            if not latencies or len(latencies) < self.min_samples:
+                return None
+
+            latencies = sorted(latencies)
+            index = min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)
+
+            return max(latencies[index], self.min_delay)
+
+    def acquire(self):
+        """
+        Checks the extra load budget and reserves a duplicate request.
+
+        Returns
+        -------
+        True if the duplicate request can be sent, otherwise False.
+        """
+
+        with self.__lock:
+            if self.__hedged + 1 > self.max_extra_load * self.__requests:
+                return False
+
+            self.__hedged += 1
+            return True
+
+    def record(self, endpoint, latency):
+        """
+        Registers the latency of a successful response.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint path.
+        latency : float
+            The number of seconds the request took.
+        """
+
+        with self.__lock:
+            latencies = self.__latencies.get(endpoint)
+            if latencies is None:
+                latencies = self.__latencies[endpoint] = deque(maxlen=self.window)
+
+            latencies.append(latency)
+
+    def record_win(self):
+        """
+        Registers that a duplicate request answered before the original one.
+        """
+
+        with self.__lock:
+            self.__wins += 1
+
+    def get_stats(self):
+        """
+        Returns the hedging statistics.
+
+        Returns
+        -------
+        A dictionary with the following keys:
+            requests: the number of requests eligible for hedging.
+            hedged: the number of duplicate requests sent.
+            wins: the number of duplicate requests that answered first.
+        """
+
+        with self.__lock:
+            return {
+                'requests': self.__requests,
+                'hedged': self.__hedged,
+                'wins': self.__wins
+            }
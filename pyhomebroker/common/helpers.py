@@ -19,13 +19,231 @@
 # limitations under the License.
 #
 
+import http.cookiejar
+import urllib.request
+
 import pandas as pd
 import numpy as np
+import requests as rq
 
 def convert_to_numeric_columns(df, columns):
+    """
+    Converts the columns with numbers in Argentine format ('1.234,56') to numeric.
+    The '-' values are converted to NaN and the columns that are already numeric are not changed.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe converted (the columns are replaced in it).
+    columns : list of str
+        The columns converted.
+    """
 
     for col in columns:
-        df[col] = df[col].apply(lambda x: x.replace('.', '').replace(',','.') if isinstance(x, str) else x)
-        df[col] = pd.to_numeric(df[col].apply(lambda x: np.nan if x == '-' else x))
+        series = df[col]
+
+        if pd.api.types.is_numeric_dtype(series.dtype):
+            continue
+
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+
+        if kind == 'string':
+            df[col] = _convert_text_to_numeric(series)
+        elif kind in ('integer', 'floating', 'mixed-integer-float', 'decimal', 'empty'):
+            df[col] = pd.to_numeric(series)
+        else:
+            # Columns that mix text and numbers are converted value by value
+            series = series.apply(lambda x: x.replace('.', '').replace(',','.') if isinstance(x, str) else x)
+            df[col] = pd.to_numeric(series.apply(lambda x: np.nan if x == '-' else x))
+
+    return df
+
+def _convert_text_to_numeric(series):
+
+    if series.hasnans:
+        series = series.fillna('-')
+
+    # The separators of every value are replaced at once in a single string instead of value by value
+    text = '\n' + '\n'.join(series.to_numpy(dtype=object)) + '\n'
+    text = text.replace('.', '').replace(',', '.')
+
+    # Replaced twice, so two consecutive '-' values are also converted (the separators overlap)
+    text = text.replace('\n-\n', '\nnan\n').replace('\n-\n', '\nnan\n')
+
+    values = text[1:-1].split('\n')
+
+    try:
+        # The values are integers when there are not decimals nor missing values (as pandas.to_numeric)
+        dtype = np.int64 if '.' not in text and 'nan' not in text else np.float64
+        result = np.array(values, dtype=dtype)
+    except (ValueError, OverflowError):
+        result = pd.to_numeric(pd.Series(values).replace('nan', np.nan)).to_numpy()
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+# The types of the known columns do not depend on the values, so every batch (and the concat of them) has the same types
+# The prices and amounts keep float64, float32 loses the cents of the prices over 65536
+_compact_types = dict(
+    [(column, 'float64') for column in ['bid', 'ask', 'last', 'open', 'high', 'low', 'close', 'previous_close', 'strike', 'price', 'turnover', 'bid_amount', 'ask_amount', 'total']] +
+    [(column, 'float32') for column in ['change', 'bid_rate', 'ask_rate']] +
+    [(column, 'int32') for column in ['bid_size', 'ask_size', 'bid_offers_count', 'ask_offers_count', 'operations', 'days', 'position', 'size', 'remaining_size']] +
+    [(column, 'int64') for column in ['volume']] +
+    [(column, 'category') for column in ['symbol', 'settlement', 'group', 'kind', 'underlying_asset']] +
+    [(column, 'datetime64') for column in ['date', 'datetime', 'expiration']])
+
+def compact_dataframe(df, decimals=4):
+    """
+    Returns a copy of the dataframe with compact types.
+
+    The known columns and index levels use a fixed type: float64 for the prices and amounts, float32 for the
+    changes and rates, int32 for the sizes (the missing sizes are 0), int64 for the volume, datetime64 for the dates
+    and categoricals for the symbols, settlements, groups, kinds and underlying assets.
+
+    The types of the other columns are selected by their values: the float columns are converted to float32 when
+    every value keeps its decimals (up to the decimals argument), the integer columns to int32 when they fit, the
+    dates to datetime64 and the text columns and index levels with repeated values to categoricals.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe converted.
+    decimals : int, optional
+        The maximum number of decimals that must be kept by the float32 columns with unknown types.
+    """
+
+    df = df.copy(deep=False)
+
+    for column in df.columns:
+        if column in _compact_types:
+            df[column] = _convert_to_compact_type(df[column], _compact_types[column])
+        else:
+            df[column] = _detect_compact_type(df[column], decimals)
+
+    if isinstance(df.index, pd.MultiIndex):
+        df.index = df.index.set_levels([
+            _convert_index_to_compact_type(level, df.index.get_level_values(position))
+            for position, level in enumerate(df.index.levels)])
+    else:
+        df.index = _convert_index_to_compact_type(df.index, df.index)
+
+    return df
+
+def _convert_to_compact_type(values, dtype):
+
+    if dtype == 'category':
+        return values.astype('category')
+
+    if dtype == 'datetime64':
+        return values if pd.api.types.is_datetime64_any_dtype(values.dtype) else pd.to_datetime(values)
+
+    if dtype.startswith('int'):
+        return values.fillna(0).astype(dtype)
+
+    return values.astype(dtype)
+
+def _detect_compact_type(series, decimals):
+
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.to_numpy(dtype=np.float64)
+        converted = values.astype(np.float32).astype(np.float64)
+
+        # The column precision is the lowest number of decimals that represents every value
+        precision = next((digits for digits in range(decimals) if np.array_equal(np.round(values, digits), values, equal_nan=True)), decimals)
+
+        if np.array_equal(np.round(converted, precision), np.round(values, precision), equal_nan=True):
+            return series.astype(np.float32)
+
+    elif pd.api.types.is_integer_dtype(series.dtype):
+        info = np.iinfo(np.int32)
+
+        if series.empty or (series.min() >= info.min and series.max() <= info.max):
+            return series.astype(np.int32)
+
+    elif pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+        kind = pd.api.types.infer_dtype(series, skipna=True)
+
+        if kind == 'date':
+            return pd.to_datetime(series)
+        elif kind == 'string' and series.nunique() <= len(series) / 2:
+            return series.astype('category')
+
+    return series
+
+def _convert_index_to_compact_type(level, values):
+
+    # The index levels (symbol and settlement in the boards) are usually the most repeated values
+    if level.name in _compact_types:
+        return _convert_to_compact_type(level, _compact_types[level.name])
+
+    return level.astype('category') if _is_repeated_text(values) else level
+
+def _is_repeated_text(index):
+
+    if not (pd.api.types.is_object_dtype(index.dtype) or pd.api.types.is_string_dtype(index.dtype)):
+        return False
+
+    return pd.api.types.infer_dtype(index, skipna=True) == 'string' and index.nunique() <= len(index) / 2
+
+def to_structured_array(df, index=True):
+    """
+    Returns the dataframe as a numpy structured array (one field by column).
+
+    The text and categorical columns are converted to fixed size unicode fields.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The dataframe converted.
+    index : bool, optional
+        If the index levels should be included as the first fields.
+    """
+
+    if index:
+        df = df.reset_index()
+
+    arrays = []
+
+    for column in df.columns:
+        series = df[column]
+
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+            arrays.append(series.to_numpy())
+        else:
+            arrays.append(series.astype(object).where(series.notna(), '').astype(str).to_numpy(dtype=str))
+
+    result = np.empty(len(df), dtype=[(str(column), array.dtype) for column, array in zip(df.columns, arrays)])
+
+    for column, array in zip(df.columns, arrays):
+        result[str(column)] = array
+
+    return result
+
+def get_cookie_domain(url):
+    """
+    Returns the domain the cookie jars assign to the cookies received from the url without a domain attribute.
+
+    The stored cookies must be restored with it, otherwise a cookie renewed by the broker is kept twice
+    (with and without the domain) and both values are sent.
+
+    Parameters
+    ----------
+    url : str
+        The url of the broker. Ex. https://www.broker.com.ar
+    """
+
+    return http.cookiejar.eff_request_host(urllib.request.Request(url))[1]
+
+def get_public_ipaddress(session=None, timeout=None):
+    """
+    Returns the public ip address sent to the brokers in the login.
+
+    Parameters
+    ----------
+    session : requests.Session, optional
+        The session used to send the request (it uses its proxies).
+    timeout : float or tuple(float, float), optional
+        The number of seconds to wait for the response.
+    """
 
-    return df
\ No newline at end of file
+    data = (session or rq).get('https://api.ipify.org/?format=json&callback=get_ip', timeout=timeout)
+    return data.json()['ip']
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default_decoder = orjson.loads if orjson else json.loads
+_decoder = _default_decoder
+
+def json_loads(data):
+    """
+    Decodes a json document with the assigned decoder.
+
+    Parameters
+    ----------
+    data : bytes or str
+        The json document. Ex. response.content
+
+    Returns
+    -------
+    The decoded document.
+    """
+
+    return _decoder(data)
+
+def set_json_decoder(decoder=None):
+    """
+    Assigns the function used to decode every json document received from the broker.
+
+    Parameters
+    ----------
+    decoder : function(data), optional
+        A function that receives the document (bytes or str) and returns the decoded document.
+        None restores the default decoder: orjson when it is installed, otherwise the json module.
+    """
+
+    global _decoder
+
+    _decoder = decoder or _default_decoder
+
+def get_json_decoder():
+    """
+    Returns the function used to decode the json documents.
+    """
+
+    return _decoder
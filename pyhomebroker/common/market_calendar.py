@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from functools import lru_cache
+
+import datetime
+
+class MarketCalendar:
+
+    # Difference between UTC & Argentina Time Zone
+    __hours = 3
+
+    # National holidays that are never moved (month, day)
+    __fixed_holidays = [(1, 1), (3, 24), (4, 2), (5, 1), (5, 25), (6, 20), (7, 9), (12, 8), (12, 25)]
+
+    # National holidays moved to a monday when they fall from tuesday to friday (month, day)
+    __movable_holidays = [(6, 17), (8, 17), (10, 12), (11, 20)]
+
+    # Carnival monday and tuesday, holy thursday and good friday (days from easter sunday)
+    __easter_holidays = [-48, -47, -3, -2]
+
+    def __init__(self, open_time=datetime.time(11), close_time=datetime.time(17), holidays=None, trading_days=None):
+        """
+        Class constructor.
+
+        The BYMA calendar: national holidays (fixed, movable and the ones that depend on easter)
+        and the session hours in Argentina Time Zone.
+
+        The holidays follow the rules in force since 2017 (law 27.399).  The holidays of previous years
+        that do not match them, the bridge holidays declared every year by decree and the changes of the
+        session hours are not known, add them with holidays, trading_days, open_time and close_time.
+
+        Parameters
+        ----------
+        open_time : datetime.time, optional
+            The session opening (Argentina Time Zone).
+        close_time : datetime.time, optional
+            The session closing (Argentina Time Zone).
+        holidays : list of datetime.date, optional
+            Other days without session (days declared non-working for tourism, market closures, etc.)
+        trading_days : list of datetime.date, optional
+            The days with session, even if the rules mark them as holidays.
+        """
+
+        self.open_time = open_time
+        self.close_time = close_time
+        self.holidays = set(self.__to_date(day) for day in holidays or [])
+        self.trading_days = set(self.__to_date(day) for day in trading_days or [])
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get_holidays(self, year):
+        """
+        Returns the sorted list of holidays of a year, including the ones added in the constructor.
+        """
+
+        holidays = set(self.__get_national_holidays(year))
+        holidays.update(day for day in self.holidays if day.year == year)
+
+        return sorted(holidays - self.trading_days)
+
+    def is_trading_day(self, day):
+        """
+        Returns if the market has session on a day.
+
+        Parameters
+        ----------
+        day : datetime.date or str
+            The day checked.  The str format is YYYY-MM-DD.
+        """
+
+        day = self.__to_date(day)
+
+        if day in self.trading_days:
+            return True
+
+        if day.weekday() >= 5 or day in self.holidays:
+            return False
+
+        return day not in self.__get_national_holidays(day.year)
+
+    def get_trading_days(self, from_date, to_date):
+        """
+        Returns the list of days with session between two days (both included).
+        """
+
+        day = self.__to_date(from_date)
+        to_date = self.__to_date(to_date)
+        result = []
+
+        while day <= to_date:
+            if self.is_trading_day(day):
+                result.append(day)
+
+            day += datetime.timedelta(days=1)
+
+        return result
+
+    def is_open(self, dt=None):
+        """
+        Returns if the market is in session.
+
+        Parameters
+        ----------
+        dt : datetime, optional
+            The date and time (Argentina Time Zone) checked.  None uses the current time.
+        """
+
+        dt = dt or self.__now()
+
+        return self.is_trading_day(dt.date()) and self.open_time <= dt.time() < self.close_time
+
+    def get_next_open(self, dt=None):
+        """
+        Returns the date and time (Argentina Time Zone) of the next session opening,
+        or dt when the market is in session.
+
+        Parameters
+        ----------
+        dt : datetime, optional
+            The date and time (Argentina Time Zone) used as start.  None uses the current time.
+        """
+
+        dt = dt or self.__now()
+
+        if self.is_open(dt):
+            return dt
+
+        day = dt.date() if dt.time() < self.open_time else dt.date() + datetime.timedelta(days=1)
+
+        while not self.is_trading_day(day):
+            day += datetime.timedelta(days=1)
+
+        return datetime.datetime.combine(day, self.open_time)
+
+    def get_seconds_to_open(self, dt=None):
+        """
+        Returns the number of seconds until the next session opening (0 when the market is in session),
+        so a poller can sleep while the market is closed.
+        """
+
+        dt = dt or self.__now()
+
+        return (self.get_next_open(dt) - dt).total_seconds()
+
+    def has_sessions(self, start, end, intraday=True):
+        """
+        Returns if a range of epochs (UTC) includes any session.
+
+        Parameters
+        ----------
+        start : int
+            The range start (epoch seconds, included).
+        end : int
+            The range end (epoch seconds, not included).
+        intraday : bool, optional
+            If the range is compared with the session hours.  Otherwise it is compared with the daily bars
+            dates (the day at 00:00 UTC).
+        """
+
+        if end <= start:
+            return False
+
+        offset = 0 if not intraday else self.__hours * 3600
+        epoch = datetime.datetime(1970, 1, 1)
+
+        first = (epoch + datetime.timedelta(seconds=start - offset)).date()
+        last = (epoch + datetime.timedelta(seconds=end - 1 - offset)).date()
+
+        for day in self.get_trading_days(first, last):
+            if not intraday:
+                return True
+
+            session_start = int((datetime.datetime.combine(day, self.open_time) - epoch).total_seconds()) + offset
+            session_end = int((datetime.datetime.combine(day, self.close_time) - epoch).total_seconds()) + offset
+
+            if session_start <= end - 1 and session_end >= start:
+                return True
+
+        return False
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __now(self):
+
+        # The naive Argentina time, the same used by the dates received in the public methods
+        return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(hours=self.__hours)
+
+    def __to_date(self, day):
+
+        if isinstance(day, str):
+            return datetime.datetime.strptime(day, '%Y-%m-%d').date()
+
+        return day.date() if isinstance(day, datetime.datetime) else day
+
+    @lru_cache(maxsize=64)
+    def __get_national_holidays(self, year):
+
+        holidays = set(datetime.date(year, month, day) for month, day in self.__fixed_holidays)
+
+        for month, day in self.__movable_holidays:
+            holiday = datetime.date(year, month, day)
+            weekday = holiday.weekday()
+
+            if weekday in (1, 2): # Tuesday and wednesday are moved to the previous monday
+                holiday -= datetime.timedelta(days=weekday)
+            elif weekday in (3, 4): # Thursday and friday are moved to the next monday
+                holiday += datetime.timedelta(days=7 - weekday)
+
+            holidays.add(holiday)
+
+        easter = self.__get_easter(year)
+        holidays.update(easter + datetime.timedelta(days=days) for days in self.__easter_holidays)
+
+        return frozenset(holidays)
+
+    def __get_easter(self, year):
+
+        # Anonymous gregorian algorithm
+        a = year % 19
+        b, c = divmod(year, 100)
+        d, e = divmod(b, 4)
+        f = (b + 8) // 25
+        g = (b - f + 1) // 3
+        h = (19 * a + b - d - g + 15) % 30
+        i, k = divmod(c, 4)
+        l = (32 + 2 * e + 2 * i - h - k) % 7
+        m = (a + 11 * h + 22 * l) // 451
+        month, day = divmod(h + l - 7 * m + 114, 31)
+
+        return datetime.date(year, month, day + 1)
+
+market_calendar = MarketCalendar()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from bisect import bisect_left
+from threading import Lock
+
+import time
+
+class Metrics:
+
+    def __init__(self, buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)):
+        """
+        Class constructor.
+
+        The metrics are recorded by endpoint (Ex. /Prices/GetByPanel) and name:
+            request_seconds: the time of the whole request, including a relogin if the session expired.
+            server_seconds: the time until the response headers were received.
+            response_bytes: the size of the response body.
+            decode_seconds: the time spent decoding the json document.
+            build_seconds: the time spent building the dataframes.
+
+        The names ending in _seconds are histograms, the rest only keep the count and the sum.
+
+        Parameters
+        ----------
+        buckets : tuple(float), optional
+            The upper bounds in seconds of the histogram buckets.
+        """
+
+        self.buckets = tuple(sorted(buckets))
+
+        self.__metrics = {}
+        self.__lock = Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def observe(self, endpoint, name, value):
+        """
+        Records a value.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint path.
+        name : str
+            The metric name.
+        value : float
+            The value to record.
+        """
+
+        with self.__lock:
+            metric = self.__metrics.get((endpoint, name))
+
+            if not metric:
+                metric = self.__metrics[(endpoint, name)] = {'count': 0, 'sum': 0.0}
+
+                if name.endswith('_seconds'):
+                    metric['buckets'] = [0] * (len(self.buckets) + 1)
+
+            metric['count'] += 1
+            metric['sum'] += value
+
+            if 'buckets' in metric:
+                metric['buckets'][bisect_left(self.buckets, value)] += 1
+
+    def measure(self, endpoint, name):
+        """
+        Returns a context manager that records the seconds spent in the block.
+
+        Parameters
+        ----------
+        endpoint : str
+            The endpoint path.
+        name : str
+            The metric name. Ex. decode_seconds
+        """
+
+        return _Timer(self, endpoint, name)
+
+    def get_metrics(self):
+        """
+        Returns the recorded metrics.
+
+        Returns
+        -------
+        A dictionary with the endpoint as key and a dictionary by metric name as value.
+        Every metric has the keys count, sum and mean.
+        The histograms also have the key buckets: a dictionary with the upper bound (inf for the last one)
+        and the cumulative count of values lower or equal to it.
+        """
+
+        with self.__lock:
+            result = {}
+
+            for (endpoint, name), metric in self.__metrics.items():
+                value = {
+                    'count': metric['count'],
+                    'sum': metric['sum'],
+                    'mean': metric['sum'] / metric['count']
+                }
+
+                if 'buckets' in metric:
+                    value['buckets'] = self.__get_cumulative_buckets(metric['buckets'])
+
+                result.setdefault(endpoint, {})[name] = value
+
+            return result
+
+    def export_prometheus(self, prefix='pyhomebroker'):
+        """
+        Returns the recorded metrics in the Prometheus text exposition format.
+
+        Parameters
+        ----------
+        prefix : str, optional
+            The prefix of the metric names.
+        """
+
+        metrics = self.get_metrics()
+        names = sorted({name for endpoint in metrics.values() for name in endpoint})
+
+        lines = []
+
+        for name in names:
+            metric_name = '{}_{}'.format(prefix, name)
+            metric_type = 'histogram' if name.endswith('_seconds') else 'summary'
+
+            lines.append('# TYPE {} {}'.format(metric_name, metric_type))
+
+            for endpoint in sorted(metrics):
+                metric = metrics[endpoint].get(name)
+                if not metric:
+                    continue
+
+                label = 'endpoint="{}"'.format(endpoint.replace('\\', '\\\\').replace('"', '\\"'))
+
+                for bound, count in metric.get('buckets', {}).items():
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append('{}_bucket{{{},le="{}"}} {}'.format(metric_name, label, le, count))
+
+                lines.append('{}_sum{{{}}} {}'.format(metric_name, label, repr(metric['sum'])))
+                lines.append('{}_count{{{}}} {}'.format(metric_name, label, metric['count']))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def reset(self):
+        """
+        Removes every recorded value.
+        """
+
+        with self.__lock:
+            self.__metrics = {}
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __get_cumulative_buckets(self, buckets):
+
+        result = {}
+        count = 0
+
+        for bound, bucket_count in zip(self.buckets + (float('inf'),), buckets):
+            count += bucket_count
+            result[bound] = count
+
+        return result
+
+class _Timer:
+
+    def __init__(self, metrics, endpoint, name):
+
+        self.metrics = metrics
+        self.endpoint = endpoint
+        self.name = name
+
+    def __enter__(self):
+
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.metrics.observe(self.endpoint, self.name, time.perf_counter() - self.start)
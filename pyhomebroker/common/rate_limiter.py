@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import deque
+from threading import Condition, Lock
+
+import asyncio
+import time
+
+class RateLimiter:
+
+    def __init__(self, rate=10, burst=None, max_concurrency=10, min_concurrency=1, latency_target=None):
+        """
+        Class constructor.
+
+        Requests are admitted by a token bucket (rate) and by a concurrency window that grows by one
+        request per window of successful responses and is halved when the broker throttles
+        (429 or 5xx responses, timeouts, connection errors or responses slower than latency_target).
+        The same limiter can be shared by threads (acquire) and event loops (acquire_async).
+
+        Parameters
+        ----------
+        rate : float, optional
+            The maximum number of requests per second.
+        burst : int, optional
+            The maximum number of requests admitted at once after an idle period. (Default: rate)
+        max_concurrency : int, optional
+            The maximum number of requests in flight.
+        min_concurrency : int, optional
+            The minimum number of requests in flight the window can be reduced to.
+        latency_target : float, optional
+            The number of seconds a response can take before it is considered a throttle signal.
+            None disables the latency signal.
+        """
+
+        self.max_rate = rate
+        self.burst = burst or max(int(rate), 1)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.latency_target = latency_target
+
+        self.__tokens = float(self.burst)
+        self.__last_refill = time.monotonic()
+        self.__window = float(max_concurrency)
+        self.__in_flight = 0
+        self.__waiting = 0
+        self.__last_decrease = 0
+        self.__latency = 0
+        self.__throttle_events = 0
+        self.__requests = 0
+        self.__completions = deque(maxlen=1000)
+        self.__async_waiters = []
+
+        self.__condition = Condition(Lock())
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def acquire(self, timeout=None):
+        """
+        Waits until a new request can be sent.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum number of seconds to wait.  None waits until the request is admitted.
+
+        Returns
+        -------
+        True if the request can be sent, False if the timeout expired.
+        """
+
+        expires = time.monotonic() + timeout if timeout is not None else None
+
+        with self.__condition:
+            self.__waiting += 1
+
+            try:
+                while True:
+                    admitted, wait = self.__admit(expires)
+                    if admitted or wait == 0:
+                        return admitted
+
+                    self.__condition.wait(wait)
+            finally:
+                self.__waiting -= 1
+
+    async def acquire_async(self, timeout=None):
+        """
+        Waits until a new request can be sent without blocking the event loop. (Check acquire)
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum number of seconds to wait.  None waits until the request is admitted.
+
+        Returns
+        -------
+        True if the request can be sent, False if the timeout expired.
+        """
+
+        loop = asyncio.get_running_loop()
+        expires = time.monotonic() + timeout if timeout is not None else None
+
+        with self.__condition:
+            self.__waiting += 1
+
+        try:
+            while True:
+                with self.__condition:
+                    admitted, wait = self.__admit(expires)
+                    if admitted or wait == 0:
+                        return admitted
+
+                    waiter = loop.create_future()
+                    self.__async_waiters.append((loop, waiter))
+
+                try:
+                    await asyncio.wait([waiter], timeout=wait)
+                finally:
+                    with self.__condition:
+                        if (loop, waiter) in self.__async_waiters:
+                            self.__async_waiters.remove((loop, waiter))
+        finally:
+            with self.__condition:
+                self.__waiting -= 1
+
+    def release(self, status_code=None, latency=None, error=False):
+        """
+        Informs the result of a request admitted by acquire.
+
+        Parameters
+        ----------
+        status_code : int, optional
+            The HTTP status code of the response.
+        latency : float, optional
+            The number of seconds the request took.
+        error : bool, optional
+            If the request failed without response (timeout, connection error).
+        """
+
+        with self.__condition:
+            now = time.monotonic()
+
+            self.__in_flight -= 1
+            self.__completions.append(now)
+
+            if latency is not None:
+                self.__latency = latency if not self.__latency else 0.8 * self.__latency + 0.2 * latency
+
+            throttled = error or \
+                (status_code is not None and (status_code == 429 or status_code >= 500)) or \
+                (self.latency_target is not None and latency is not None and latency > self.latency_target)
+
+            if throttled:
+                self.__throttle_events += 1
+
+                # Only one decrease per round trip, the responses of the requests already in flight belong to the same event
+                if now - self.__last_decrease > max(self.__latency, 0.1):
+                    self.__window = max(self.__window / 2, self.min_concurrency)
+                    self.__last_decrease = now
+            else:
+                self.__window = min(self.__window + 1 / self.__window, self.max_concurrency)
+
+            self.__notify_all()
+
+    def get_stats(self):
+        """
+        Returns the limiter statistics.
+
+        Returns
+        -------
+        A dictionary with the following keys:
+            rate: the number of requests per second completed in the last 10 seconds.
+            max_rate: the maximum number of requests per second.
+            concurrency: the current concurrency window.
+            in_flight: the number of requests sent and not completed.
+            queue_depth: the number of requests waiting to be sent.
+            throttle_events: the number of throttle signals received.
+            requests: the number of requests admitted.
+            latency: the moving average of the latency in seconds.
+        """
+
+        with self.__condition:
+            now = time.monotonic()
+            completions = len([ts for ts in self.__completions if now - ts <= 10])
+
+            return {
+                'rate': completions / 10,
+                'max_rate': self.max_rate,
+                'concurrency': int(self.__window),
+                'in_flight': self.__in_flight,
+                'queue_depth': self.__waiting,
+                'throttle_events': self.__throttle_events,
+                'requests': self.__requests,
+                'latency': self.__latency
+            }
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __admit(self, expires):
+
+        # It returns (True, 0) when the request is admitted, (False, 0) when the timeout expired, otherwise
+        # (False, seconds to wait) where None waits until other request is released
+        now = time.monotonic()
+        self.__refill(now)
+
+        has_slot = self.__in_flight < int(self.__window)
+        if has_slot and self.__tokens >= 1:
+            self.__tokens -= 1
+            self.__in_flight += 1
+            self.__requests += 1
+            return True, 0
+
+        # Without a free slot the wait ends when other request is released
+        wait = (1 - self.__tokens) / self.max_rate if has_slot else None
+
+        if expires is not None:
+            remaining = expires - now
+            if remaining <= 0:
+                return False, 0
+
+            wait = min(wait, remaining) if wait is not None else remaining
+
+        return False, wait
+
+    def __notify_all(self):
+
+        self.__condition.notify_all()
+
+        # The requests waiting in event loops are woken up in their loop (it can be running in other thread)
+        for loop, waiter in self.__async_waiters:
+            try:
+                loop.call_soon_threadsafe(_wake_up, waiter)
+            except RuntimeError:
+                # The loop is closed
+                pass
+
+        self.__async_waiters.clear()
+
+    def __refill(self, now):
+
+        self.__tokens = min(self.__tokens + (now - self.__last_refill) * self.max_rate, self.burst)
+        self.__last_refill = now
+
+def _wake_up(waiter):
+
+    if not waiter.done():
+        waiter.set_result(None)
+
+_rate_limiters = {}
+_rate_limiters_lock = Lock()
+
+def get_rate_limiter(key, **kwargs):
+    """
+    Returns the rate limiter shared by every session that uses the same key.
+
+    Parameters
+    ----------
+    key : str
+        The key of the limiter.  The sessions use the broker page.
+    **kwargs
+        The arguments used to create the limiter if it does not exist. (Check RateLimiter)
+
+    Returns
+    -------
+    A RateLimiter object.
+    """
+
+    with _rate_limiters_lock:
+        if key not in _rate_limiters:
+            _rate_limiters[key] = RateLimiter(**kwargs)
+
+        return _rate_limiters[key]
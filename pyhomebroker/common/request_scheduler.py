@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from .rate_limiter import _wake_up
+
+from threading import Condition, Lock
+
+import asyncio
+import time
+
+PRIORITY_ORDERS = 0
+PRIORITY_ORDERS_STATUS = 1
+PRIORITY_MARKET_DATA = 2
+PRIORITY_HISTORY = 3
+
+class RequestScheduler:
+
+    __priorities = 4
+
+    def __init__(self, max_concurrency=10, reserved=1):
+        """
+        Class constructor.
+
+        Requests are sent in priority order (orders and cancellations, orders status, market data and history)
+        and the last connections are reserved for orders, so they never wait behind market data requests.
+        The same scheduler can be shared by threads (acquire) and event loops (acquire_async).
+
+        Parameters
+        ----------
+        max_concurrency : int, optional
+            The maximum number of requests in flight.  It should be the connection pool size.
+        reserved : int, optional
+            The number of requests in flight only available for orders.
+        """
+
+        if reserved >= max_concurrency:
+            raise ValueError('The reserved requests must be less than the maximum concurrency')
+
+        self.max_concurrency = max_concurrency
+        self.reserved = reserved
+
+        self.__in_flight = 0
+        self.__waiting = [0] * self.__priorities
+        self.__wait_time = [0.0] * self.__priorities
+        self.__requests = [0] * self.__priorities
+        self.__async_waiters = []
+
+        self.__condition = Condition(Lock())
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def acquire(self, priority=PRIORITY_MARKET_DATA, timeout=None):
+        """
+        Waits until a request with the specified priority can be sent.
+
+        Parameters
+        ----------
+        priority : int, optional
+            The request priority.
+            Valid values:
+                PRIORITY_ORDERS: orders and cancellations.
+                PRIORITY_ORDERS_STATUS: orders status.
+                PRIORITY_MARKET_DATA: securities, options, portfolio and snapshots.
+                PRIORITY_HISTORY: daily and intraday history.
+        timeout : float, optional
+            The maximum number of seconds to wait.  None waits until the request is admitted.
+
+        Returns
+        -------
+        True if the request can be sent, False if the timeout expired.
+        """
+
+        start = time.monotonic()
+        expires = start + timeout if timeout is not None else None
+
+        with self.__condition:
+            self.__waiting[priority] += 1
+
+            try:
+                while not self.__can_start(priority):
+                    remaining = expires - time.monotonic() if expires is not None else None
+                    if remaining is not None and remaining <= 0:
+                        # The requests with lower priority can be waiting for this one
+                        self.__notify_all()
+                        return False
+
+                    self.__condition.wait(remaining)
+
+                self.__start(priority, start)
+
+                return True
+            finally:
+                self.__waiting[priority] -= 1
+
+    async def acquire_async(self, priority=PRIORITY_MARKET_DATA, timeout=None):
+        """
+        Waits until a request with the specified priority can be sent without blocking the event loop.
+        (Check acquire)
+
+        Parameters
+        ----------
+        priority : int, optional
+            The request priority.
+        timeout : float, optional
+            The maximum number of seconds to wait.  None waits until the request is admitted.
+
+        Returns
+        -------
+        True if the request can be sent, False if the timeout expired.
+        """
+
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        expires = start + timeout if timeout is not None else None
+
+        with self.__condition:
+            self.__waiting[priority] += 1
+
+        try:
+            while True:
+                with self.__condition:
+                    if self.__can_start(priority):
+                        self.__waiting[priority] -= 1
+                        self.__start(priority, start)
+                        return True
+
+                    remaining = expires - time.monotonic() if expires is not None else None
+                    if remaining is not None and remaining <= 0:
+                        break
+
+                    waiter = loop.create_future()
+                    self.__async_waiters.append((loop, waiter))
+
+                try:
+                    await asyncio.wait([waiter], timeout=remaining)
+                finally:
+                    with self.__condition:
+                        if (loop, waiter) in self.__async_waiters:
+                            self.__async_waiters.remove((loop, waiter))
+        except:
+            self.__cancel_waiting(priority)
+            raise
+
+        self.__cancel_waiting(priority)
+
+        return False
+
+    def release(self):
+        """
+        Informs that a request admitted by acquire is completed.
+        """
+
+        with self.__condition:
+            self.__in_flight -= 1
+            self.__notify_all()
+
+    def get_stats(self):
+        """
+        Returns the scheduler statistics.
+
+        Returns
+        -------
+        A dictionary with the following keys:
+            in_flight: the number of requests sent and not completed.
+            waiting: the number of requests waiting to be sent by priority.
+            wait_time: the moving average of the seconds waited before being sent by priority.
+            requests: the number of requests sent by priority.
+        """
+
+        with self.__condition:
+            return {
+                'in_flight': self.__in_flight,
+                'waiting': list(self.__waiting),
+                'wait_time': list(self.__wait_time),
+                'requests': list(self.__requests)
+            }
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __start(self, priority, start):
+
+        self.__in_flight += 1
+        self.__requests[priority] += 1
+
+        wait_time = time.monotonic() - start
+        self.__wait_time[priority] = wait_time if self.__requests[priority] == 1 else \
+            0.8 * self.__wait_time[priority] + 0.2 * wait_time
+
+    def __cancel_waiting(self, priority):
+
+        # The requests with lower priority can be waiting for this one (the timeout expired or the task was cancelled)
+        with self.__condition:
+            self.__waiting[priority] -= 1
+            self.__notify_all()
+
+    def __notify_all(self):
+
+        self.__condition.notify_all()
+
+        # The requests waiting in event loops are woken up in their loop (it can be running in other thread)
+        for loop, waiter in self.__async_waiters:
+            try:
+                loop.call_soon_threadsafe(_wake_up, waiter)
+            except RuntimeError:
+                # The loop is closed
+                pass
+
+        self.__async_waiters.clear()
+
+    def __can_start(self, priority):
+
+        limit = self.max_concurrency if priority == PRIORITY_ORDERS else self.max_concurrency - self.reserved
+
+        return self.__in_flight < limit and not any(self.__waiting[:priority])
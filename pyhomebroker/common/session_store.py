@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from contextlib import contextmanager
+from threading import Lock
+
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+class SessionStore:
+
+    def __init__(self, path, ttl=8 * 3600):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        path : str
+            The file where the sessions are persisted.
+        ttl : int, optional
+            The number of seconds a stored session is considered usable after it was saved.
+            Expired sessions are not restored and a full login is performed.
+
+        The changes are serialized with a lock file (path.lock) so several processes can share the store.
+        The lock file is not used on Windows (fcntl is not available).
+        """
+
+        self.path = path
+        self.ttl = ttl
+
+        self.__lock = Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def load(self, broker_id, dni, user):
+        """
+        Returns the stored session of the specified account.
+
+        Parameters
+        ----------
+        broker_id : int
+            The broker id registered in ByMA.
+        dni : int
+            The national document identification of the user.
+        user : str
+            The username used in the platform.
+
+        Returns
+        -------
+        A dictionary with the keys broker_id, cookies, ipaddress and expires or None if there is no stored session.
+        The session is returned even if it is expired, so the resolved ip address can be reused. (Check is_expired)
+        """
+
+        with self.__lock:
+            return self.__read().get(self.__get_key(broker_id, dni, user))
+
+    def save(self, broker_id, dni, user, cookies, ipaddress):
+        """
+        Stores the session of the specified account.
+
+        Parameters
+        ----------
+        broker_id : int
+            The broker id registered in ByMA.
+        dni : int
+            The national document identification of the user.
+        user : str
+            The username used in the platform.
+        cookies : dictionary
+            The cookies returned by the broker after the login.
+        ipaddress : str
+            The public ip address informed to the broker in the login.
+        """
+
+        with self.__locked():
+            sessions = self.__read()
+            sessions[self.__get_key(broker_id, dni, user)] = {
+                'broker_id': broker_id,
+                'cookies': cookies,
+                'ipaddress': ipaddress,
+                'expires': time.time() + self.ttl
+            }
+            self.__write(sessions)
+
+    def remove(self, broker_id, dni, user):
+        """
+        Removes the stored session of the specified account.
+
+        Parameters
+        ----------
+        broker_id : int
+            The broker id registered in ByMA.
+        dni : int
+            The national document identification of the user.
+        user : str
+            The username used in the platform.
+        """
+
+        with self.__locked():
+            sessions = self.__read()
+            if sessions.pop(self.__get_key(broker_id, dni, user), None) is not None:
+                self.__write(sessions)
+
+    def is_expired(self, session):
+        """
+        Returns if the stored session has expired.
+
+        Parameters
+        ----------
+        session : dictionary
+            A session returned by load.
+        """
+
+        return not session or session.get('expires', 0) <= time.time()
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __get_key(self, broker_id, dni, user):
+
+        return '{}:{}:{}'.format(broker_id, dni, str(user).lower())
+
+    @contextmanager
+    def __locked(self):
+
+        # The threads share the lock, the processes the lock file.  Otherwise two processes saving different
+        # accounts at the same time read the same sessions and the last replace drops the other account
+        with self.__lock:
+            if not fcntl:
+                yield
+                return
+
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+            with open(self.path + '.lock', 'a') as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def __read(self):
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def __write(self, sessions):
+
+        # Write to a temporary file and replace the store so other processes never read a partial file
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.sessions-')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(sessions, f)
+
+            os.chmod(tmp_path, 0o600) # The file contains the session cookies
+            os.replace(tmp_path, self.path)
+        except:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from threading import Event, Lock
+
+class SingleFlight:
+
+    def __init__(self):
+        """
+        Class constructor.
+        Concurrent calls with the same key share the execution of the first one.
+        """
+
+        self.__lock = Lock()
+        self.__calls = {}
+
+        self.__executions = 0
+        self.__shared = 0
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def do(self, key, fn, timeout=None, copy=None):
+        """
+        Executes the function or waits for the execution already in progress with the same key.
+
+        Parameters
+        ----------
+        key : hashable
+            The key that identifies identical calls.
+        fn : function()
+            The function executed by the first call.
+        timeout : float, optional
+            The maximum number of seconds a call waits for the execution in progress.
+        copy : function(result), optional
+            The function used to copy the result when it is shared by more than one call,
+            so no caller can modify the result received by the others.
+
+        Raises
+        ------
+        TimeoutError
+            The execution in progress did not finish in the specified timeout.
+        Any exception raised by the function is raised in every call.
+
+        Returns
+        -------
+        The value returned by the function.
+        """
+
+        with self.__lock:
+            call = self.__calls.get(key)
+            leader = call is None
+
+            if leader:
+                call = _Call()
+                self.__calls[key] = call
+                self.__executions += 1
+            else:
+                call.waiting += 1
+                self.__shared += 1
+
+        if not leader:
+            if not call.event.wait(timeout):
+                raise TimeoutError('Timeout waiting for the call in progress')
+
+            if call.error:
+                raise call.error
+
+            return copy(call.result) if copy else call.result
+
+        try:
+            call.result = fn()
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+                waiting = call.waiting
+
+            call.event.set()
+
+        # The stored result is never returned when it is shared, so no caller sees the changes of the others
+        return copy(call.result) if copy and waiting else call.result
+
+    def get_stats(self):
+        """
+        Returns the number of executions and the number of calls that shared an execution.
+        """
+
+        with self.__lock:
+            return {'executions': self.__executions, 'shared': self.__shared}
+
+class _Call:
+
+    def __init__(self):
+
+        self.event = Event()
+        self.waiting = 0
+        self.result = None
+        self.error = None
@@ -0,0 +1,630 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import brokers
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Lock, Thread
+
+import datetime
+import json
+import random
+import secrets
+import socket
+import time
+import urllib.parse
+import zlib
+
+import numpy as np
+
+class BrokerEmulator:
+
+    __boards = ['accionesLideres', 'panelGeneral', 'cedears', 'rentaFija', 'letes', 'obligaciones']
+    __settlements = {'1': 'Contado', '2': '24 Hs.', '3': '48 Hs.'}
+    __order_statuses = ['Pendiente', 'Recibida', 'Parcial', 'Cumplida', 'Anulada']
+
+    # Difference between UTC & Argentina Time Zone
+    __hours = 3
+
+    def __init__(self, host='127.0.0.1', port=0, broker_id=0, board_size=100, options_size=1000,
+        orders_size=20, latency=0, error_rate=0, error_status=500, users=None, holidays=None, seed=0):
+        """
+        Class constructor.
+
+        A local HTTP server with the endpoints used by the library and synthetic data,
+        to run the library (and benchmarks) without a broker account.  SignalR is not emulated.
+
+        Parameters
+        ----------
+        host : str, optional
+            The address the server listens to.
+        port : int, optional
+            The port the server listens to.  0 uses a free port.
+        broker_id : int, optional
+            The broker identification registered (in brokers.py) while the server is running,
+            so HomeBroker(emulator.broker_id) sends its requests to the emulator.
+        board_size : int, optional
+            The number of securities returned by every board and settlement.
+        options_size : int, optional
+            The number of options returned by the options board.
+        orders_size : int, optional
+            The number of orders returned by the orders status of every account.
+        latency : float or tuple(float, float), optional
+            The number of seconds (or the (min, max) range of seconds) every response is delayed.
+        error_rate : float, optional
+            The fraction of the data requests answered with an error. Ex. 0.01 = 1%
+        error_status : int, optional
+            The HTTP status code of the injected errors.
+        users : dict, optional
+            The valid credentials with the format {(dni, user): password}.  None accepts any credentials.
+        holidays : list of datetime.date, optional
+            The weekdays without session, the history does not return bars for them.
+            They are independent of pyhomebroker.MarketCalendar, so it can be checked against them.
+        seed : int, optional
+            The seed used to generate the synthetic data.
+        """
+
+        self.host = host
+        self.port = port
+        self.broker_id = broker_id
+        self.board_size = board_size
+        self.options_size = options_size
+        self.orders_size = orders_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.users = users
+        self.holidays = holidays or []
+        self.seed = seed
+
+        self.__server = None
+        self.__thread = None
+        self.__lock = Lock()
+        self.__random = random.Random(seed)
+        self.__sessions = {}
+        self.__renewals = set()
+        self.__orders = {}
+        self.__pending_orders = {}
+        self.__order_number = 100000
+        self.__hits = {}
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def start(self):
+        """
+        Starts the server in a background thread and registers the broker.
+
+        Returns
+        -------
+        The emulator object.
+        """
+
+        self.__server = ThreadingHTTPServer((self.host, self.port), _RequestHandler)
+        self.__server.daemon_threads = True
+        self.__server.emulator = self
+        self.port = self.__server.server_address[1]
+
+        self.__thread = Thread(target=self.__server.serve_forever, daemon=True)
+        self.__thread.start()
+
+        self.__register_broker()
+
+        return self
+
+    def stop(self):
+        """
+        Stops the server and removes the registered broker.
+        """
+
+        if self.__server:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+        brokers[:] = [broker for broker in brokers if broker['broker_id'] != self.broker_id]
+
+    def expire_sessions(self):
+        """
+        Invalidates every session, so the next requests are redirected to the login page.
+        """
+
+        with self.__lock:
+            self.__sessions = {}
+
+    def renew_sessions(self):
+        """
+        Renews the cookie of every session in its next data request.  The old cookie is not valid anymore.
+        """
+
+        with self.__lock:
+            self.__renewals = set(self.__sessions)
+
+    def get_hits(self):
+        """
+        Returns a dictionary with the number of requests received by path.
+        """
+
+        with self.__lock:
+            return dict(self.__hits)
+
+    @property
+    def url(self):
+        """
+        The base URL of the emulator.
+        """
+
+        return 'http://{}:{}'.format(self.host, self.port)
+
+    def __enter__(self):
+
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.stop()
+
+#######################
+#### REQUEST LOGIC ####
+#######################
+    def handle(self, method, path, query, cookies, body):
+        """
+        Answers a request.  It is called by the request handler of the server.
+
+        Returns
+        -------
+        A tuple with the status code, the content type, the body and the headers.
+        """
+
+        with self.__lock:
+            self.__hits[path] = self.__hits.get(path, 0) + 1
+
+        self.__sleep()
+
+        if path in ('', '/'):
+            return self.__home_page(cookies)
+
+        if path.lower() == '/login':
+            return 200, 'text/html', self.__login_page(), {}
+
+        if path in ('/Login/Ingresar', '/Login/IngresarModal'):
+            return self.__login(path, body)
+
+        account = self.__get_account(cookies)
+        if not account:
+            return 302, 'text/html', b'', {'Location': '/Login'}
+
+        if self.error_rate and self.__random.random() < self.error_rate:
+            return self.error_status, 'text/plain', b'Emulated error', {}
+
+        handlers = {
+            '/Prices/GetByPanel': self.__get_by_panel,
+            '/Prices/GetByStock': self.__get_by_stock,
+            '/Prices/GetFavoritos': self.__get_favorites,
+            '/HistoricoPrecios/history': self.__get_daily_history,
+            '/Intradiario/history': self.__get_intraday_history,
+            '/Consultas/GetConsulta': self.__get_orders_status,
+            '/Order/ValidarCargaOrdenAsync': self.__validate_order,
+            '/Order/EnviarOrdenConfirmadaAsyc': self.__confirm_order,
+            '/Order/EnviarOrdenReconfirmada': self.__confirm_order,
+            '/Order/EnviarCancelacionAsyc': self.__validate_cancellation,
+            '/Order/EnviarOrdenCanceladaAsyc': self.__confirm_cancellation
+        }
+
+        handler = handlers.get(path)
+        if not handler:
+            return 404, 'text/plain', b'Not found', {}
+
+        headers = self.__renew_session(cookies.get('ASP.NET_SessionId'))
+
+        return 200, 'application/json; charset=utf-8', json.dumps(handler(account, query, body)).encode(), headers
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __register_broker(self):
+
+        brokers[:] = [broker for broker in brokers if broker['broker_id'] != self.broker_id]
+        brokers.append({
+            'broker_id': self.broker_id,
+            'name': 'Local broker emulator',
+            'page': self.url})
+
+    def __sleep(self):
+
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self.__random.uniform(*latency)
+
+        if latency:
+            time.sleep(latency)
+
+    def __get_account(self, cookies):
+
+        with self.__lock:
+            return self.__sessions.get(cookies.get('ASP.NET_SessionId'))
+
+    def __renew_session(self, token):
+
+        with self.__lock:
+            if token not in self.__renewals:
+                return {}
+
+            self.__renewals.discard(token)
+            renewed = secrets.token_hex(16)
+            self.__sessions[renewed] = self.__sessions.pop(token)
+
+        return {'Set-Cookie': 'ASP.NET_SessionId={}; Path=/; HttpOnly'.format(renewed)}
+
+    def __home_page(self, cookies):
+
+        if self.__get_account(cookies):
+            return 200, 'text/html', b'<html><body><div id="usuarioLogueado">Emulator</div></body></html>', {}
+
+        return 200, 'text/html', self.__login_page(), {}
+
+    def __login_page(self, error=None):
+
+        error = '<div class="callout-danger">{}</div>'.format(error) if error else ''
+        return '<html><body>{}<form action="/Login/Ingresar"></form></body></html>'.format(error).encode()
+
+    def __login(self, path, body):
+
+        if path == '/Login/IngresarModal':
+            data = json.loads(body or b'{}')
+        else:
+            data = {key: values[0] for key, values in urllib.parse.parse_qs(body.decode()).items()}
+
+        dni = data.get('Dni')
+        user = data.get('Usuario')
+
+        if self.users is not None and self.users.get((int(dni or 0), user)) != data.get('Password'):
+            return 200, 'text/html', self.__login_page('Usuario o clave incorrectos'), {}
+
+        token = secrets.token_hex(16)
+        with self.__lock:
+            self.__sessions[token] = '{}:{}'.format(dni, user)
+
+        headers = {'Set-Cookie': 'ASP.NET_SessionId={}; Path=/; HttpOnly'.format(token)}
+        return 200, 'text/html', b'<html><body><div id="usuarioLogueado">Emulator</div></body></html>', headers
+
+    def __get_by_panel(self, account, query, body):
+
+        payload = json.loads(body or b'{}')
+        panel = payload.get('panel')
+        term = payload.get('term') or ''
+
+        if panel == 'opciones':
+            stocks = [self.__create_option(index) for index in range(self.options_size)]
+        elif panel == 'cauciones':
+            stocks = [self.__create_repo(days) for days in range(1, 31)]
+        elif panel in self.__boards and term in self.__settlements:
+            stocks = [self.__create_security('{}{}'.format(panel[:4].upper(), index), term, panel) for index in range(self.board_size)]
+        else:
+            return self.__error('Panel invalido')
+
+        return {'Success': True, 'Result': {'Stocks': stocks}, 'Error': None}
+
+    def __get_by_stock(self, account, query, body):
+
+        payload = json.loads(body or b'{}')
+
+        stock = self.__create_security(payload.get('symbol') or '', payload.get('term') or '', 'panelGeneral')
+        stock['StockDepthBox'] = self.__create_depth_box(stock['LastPrice'])
+
+        return {'Success': True, 'Result': {'Stock': stock}, 'Error': None}
+
+    def __get_favorites(self, account, query, body):
+
+        stocks = []
+        for index in range(10):
+            stock = self.__create_security('FAV{}'.format(index), '2', 'accionesLideres')
+            stock['StockDepthBox'] = self.__create_depth_box(stock['LastPrice'])
+            stocks.append(stock)
+
+        return {'Success': True, 'Result': stocks, 'Error': None}
+
+    def __get_daily_history(self, account, query, body):
+
+        start = int(query.get('from', ['0'])[0])
+        end = int(query.get('to', ['0'])[0])
+
+        days = np.arange(start - start % 86400, end, 86400, dtype=np.int64)
+        days = days[(days >= start) & (((days // 86400) + 3) % 7 < 5)] # Only weekdays (1970-01-01 was thursday)
+        days = days[~np.isin(days // 86400, self.__get_holidays())]
+
+        return self.__create_history(query.get('symbol', [''])[0], days)
+
+    def __get_intraday_history(self, account, query, body):
+
+        start = int(query.get('from', ['0'])[0])
+        end = int(query.get('to', ['0'])[0])
+
+        minutes = np.arange(start - start % 60, end, 60, dtype=np.int64)
+        local = minutes - self.__hours * 3600
+        local_minute = (local % 86400) // 60
+        weekday = ((local // 86400) + 3) % 7
+
+        minutes = minutes[(minutes >= start) & (local_minute >= 11 * 60) & (local_minute < 17 * 60) & (weekday < 5)]
+        minutes = minutes[~np.isin((minutes - self.__hours * 3600) // 86400, self.__get_holidays())]
+
+        return self.__create_history(query.get('symbol', [''])[0], minutes)
+
+    def __get_holidays(self):
+
+        epoch = datetime.date(1970, 1, 1)
+
+        # The holidays as number of days since the epoch, the same unit used to filter the bars
+        return np.array([(day - epoch).days for day in self.holidays], dtype=np.int64)
+
+    def __create_history(self, symbol, timestamps):
+
+        if not len(timestamps):
+            # Same as the broker UDF endpoint, a range without bars only returns the status
+            return {'s': 'no_data'}
+
+        # The prices only depend on the symbol and the timestamp, so overlapped requests return the same bars
+        rnd = np.random.default_rng(zlib.crc32(symbol.encode()) + self.seed)
+        base = rnd.uniform(10, 1000)
+
+        close = base * (1 + 0.2 * np.sin(timestamps / 8e6 + rnd.uniform(0, 6)))
+        open_ = close * (1 + 0.005 * np.cos(timestamps / 7e4))
+        high = np.maximum(open_, close) * 1.01
+        low = np.minimum(open_, close) * 0.99
+        volume = (1000 + (timestamps // 60) % 9973).astype(np.int64)
+
+        return {
+            's': 'ok',
+            't': timestamps.tolist(),
+            'o': np.round(open_, 2).tolist(),
+            'h': np.round(high, 2).tolist(),
+            'l': np.round(low, 2).tolist(),
+            'c': np.round(close, 2).tolist(),
+            'v': volume.tolist()
+        }
+
+    def __get_orders_status(self, account, query, body):
+
+        orders = self.__get_account_orders(account)
+
+        with self.__lock:
+            orders = [dict(order) for order in orders]
+
+        return {'Success': True, 'Result': [{'listaDetalleTiker': [{'ORDE': orders}]}] if orders else None, 'Error': None}
+
+    def __validate_order(self, account, query, body):
+
+        payload = json.loads(body or b'{}')
+
+        if not payload.get('NombreEspecie') or not payload.get('Cantidad'):
+            return self.__error('Orden invalida')
+
+        with self.__lock:
+            self.__pending_orders[account] = payload
+
+        return {'Success': True, 'Result': {'ResponseOrden': {'Verified': True, 'ErrorMessage': None}}, 'Error': None}
+
+    def __confirm_order(self, account, query, body):
+
+        with self.__lock:
+            payload = self.__pending_orders.pop(account, None)
+
+        if not payload:
+            return self.__error('No hay orden para confirmar')
+
+        price = float(payload['Precio'].replace(',', '.'))
+        size = int(payload['Cantidad'])
+
+        orders = self.__get_account_orders(account)
+
+        with self.__lock:
+            self.__order_number += 1
+            order = self.__create_order(self.__order_number, payload['NombreEspecie'], payload['OptionTipoPlazo'],
+                'CPRA' if payload['OptionTipo'] == 1 else 'VTA', size, price, 'Pendiente')
+            orders.append(order)
+
+        return {'Success': True, 'Result': {'ResponseOrden': {'Verified': True, 'Accepted': True, 'Orden': {'NroOrden': order['NUME']}, 'ErrorMessage': None}}, 'Error': None}
+
+    def __validate_cancellation(self, account, query, body):
+
+        payload = json.loads(body or b'{}')
+
+        with self.__lock:
+            self.__pending_orders[account] = payload
+
+        return {'Success': True, 'Result': None, 'Error': None}
+
+    def __confirm_cancellation(self, account, query, body):
+
+        with self.__lock:
+            payload = self.__pending_orders.pop(account, None)
+
+        if not payload:
+            return self.__error('No hay cancelacion para confirmar')
+
+        orders = self.__get_account_orders(account)
+
+        with self.__lock:
+            for order in orders:
+                if order['NUME'] == str(payload.get('Numero')) and order['CanCancel']:
+                    order['ESTA'] = 'Anulada'
+                    order['CanCancel'] = False
+                    return {'Success': True, 'Result': None, 'Error': None}
+
+        return self.__error('Orden no cancelable')
+
+    def __get_account_orders(self, account):
+
+        with self.__lock:
+            if account not in self.__orders:
+                rnd = random.Random('{}:{}'.format(self.seed, account))
+
+                self.__orders[account] = [
+                    self.__create_order(
+                        self.__order_number - index,
+                        'SYM{}'.format(rnd.randint(0, 99)),
+                        rnd.choice(list(self.__settlements)),
+                        rnd.choice(['CPRA', 'VTA']),
+                        rnd.randint(1, 1000),
+                        round(rnd.uniform(10, 1000), 2),
+                        rnd.choice(self.__order_statuses))
+                    for index in range(self.orders_size)]
+
+            return self.__orders[account]
+
+    def __create_order(self, number, symbol, settlement, operation, size, price, status):
+
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(hours=self.__hours)
+
+        return {
+            'NUME': str(number),
+            'CESP': str(zlib.crc32(symbol.encode()) % 100000),
+            'TICK': symbol,
+            'PLAZ': self.__settlements.get(str(settlement), '24 Hs.'),
+            'TIPO': operation,
+            'CANT': str(size),
+            'PCIO': str(price),
+            'IMPO': str(round(size * price, 2)),
+            'FALT': now.strftime('%d/%m/%y'),
+            'HORA': now.strftime('%H:%M:%S'),
+            'FVTO': now.strftime('%d/%m/%Y'),
+            'ESTA': status,
+            'CanCancel': status in ('Pendiente', 'Recibida', 'Parcial'),
+            'APLI': [{'CANT': str(size // 2), 'IMPO': str(round(size // 2 * price, 2))}] if status == 'Parcial' else None
+        }
+
+    def __create_security(self, symbol, term, panel):
+
+        rnd = random.Random('{}:{}'.format(self.seed, symbol))
+        price = round(rnd.uniform(10, 1000), 2)
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None) - datetime.timedelta(hours=self.__hours)
+
+        return {
+            'Symbol': symbol,
+            'Term': term,
+            'BuyQuantity': rnd.randint(1, 10000),
+            'BuyPrice': round(price * 0.99, 2),
+            'SellPrice': round(price * 1.01, 2),
+            'SellQuantity': rnd.randint(1, 10000),
+            'LastPrice': price,
+            'VariationRate': round(rnd.uniform(-5, 5), 2),
+            'StartPrice': round(price * rnd.uniform(0.97, 1.03), 2),
+            'MaxPrice': round(price * 1.03, 2),
+            'MinPrice': round(price * 0.97, 2),
+            'PreviousClose': round(price * rnd.uniform(0.97, 1.03), 2),
+            'TotalAmountTraded': round(price * 10000, 2),
+            'TotalQuantityTraded': 10000,
+            'Trades': rnd.randint(1, 1000),
+            'TradeDate': now.strftime('%Y%m%d'),
+            'Hour': now.strftime('%H:%M:%S'),
+            'Panel': panel,
+            'ClosePrice': '-',
+            'MaturityDate': '',
+            'StrikePrice': 0,
+            'PutOrCall': 0,
+            'Issuer': '',
+            'CantDias': 0,
+            'StockDepthBox': None
+        }
+
+    def __create_option(self, index):
+
+        underlying = ['GFGC', 'YPFC', 'PAMP', 'ALUC', 'COME'][index % 5]
+        strike = 50 + index
+        kind = 1 + index % 2
+
+        option = self.__create_security('{}{:04d}{}'.format(underlying, strike, 'OC' if kind == 1 else 'OP')[:10], '', 'opciones')
+        option['MaturityDate'] = (datetime.date.today() + datetime.timedelta(days=30 + 60 * (index % 3))).strftime('%Y%m%d')
+        option['StrikePrice'] = strike
+        option['PutOrCall'] = kind
+        option['Issuer'] = underlying
+
+        return option
+
+    def __create_repo(self, days):
+
+        repo = self.__create_security('PESOS', (datetime.date.today() + datetime.timedelta(days=days)).strftime('%Y%m%d'), 'cauciones')
+        repo['CantDias'] = days
+
+        return repo
+
+    def __create_depth_box(self, price):
+
+        return {
+            'PriceDepthBox': {
+                'BuySide': [{'Pos': pos, 'BuyQuantity': 100 * pos, 'BuyPrice': round(price * (1 - pos / 100), 2), 'NumberOfOrders': pos} for pos in range(1, 6)],
+                'SellSide': [{'Pos': pos, 'SellQuantity': 100 * pos, 'SellPrice': round(price * (1 + pos / 100), 2), 'NumberOfOrders': pos} for pos in range(1, 6)]
+            }
+        }
+
+    def __error(self, message):
+
+        return {'Success': False, 'Result': None, 'Error': {'Descripcion': message}}
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+
+        super().setup()
+
+        # Headers and body are written separately, without this every response waits for the delayed ACK
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format, *args):
+
+        pass
+
+    def do_GET(self):
+
+        self.__handle('GET')
+
+    def do_POST(self):
+
+        self.__handle('POST')
+
+    def __handle(self, method):
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        url = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(url.query)
+
+        # The first value of a repeated cookie is used, like the broker does
+        cookies = {}
+        for cookie in (self.headers.get('Cookie') or '').split(';'):
+            if '=' in cookie:
+                name, value = cookie.strip().split('=', 1)
+                cookies.setdefault(name, value)
+
+        status, content_type, content, headers = self.server.emulator.handle(method, url.path, query, cookies, body)
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+
+        for name, value in headers.items():
+            self.send_header(name, value)
+
+        self.end_headers()
+        self.wfile.write(content)
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""
+Downloads the daily history of every symbol listed in the boards and resumes from the last checkpoint.
+
+Usage:
+    python -m pyhomebroker.eod_download --broker 265 --dni 12345678 --user john --from 2020-01-01 --output eod
+        [--to 2024-01-01] [--state eod/state.json] [--workers 8] [--retries 3] [--boards bluechips cedears] [--no-options]
+
+The password is read from the PYHOMEBROKER_PASSWORD environment variable or asked in the terminal.
+"""
+
+from .home_broker import HomeBroker
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
+
+import argparse
+import datetime
+import getpass
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+
+class EodDownload:
+
+    def __init__(self, home_broker, from_date, to_date=None, output_dir=None, state_file=None,
+        max_workers=8, retries=3, retry_delay=1, boards=None, include_options=True,
+        on_result=None, on_progress=None):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        home_broker : pyhomebroker.HomeBroker
+            The logged in object used to list the boards and download the history.
+        from_date : datetime.date or str
+            The start date of the history.  The str format is YYYY-MM-DD.
+        to_date : datetime.date or str, optional
+            The end date of the history.  None resumes the end date of the saved progress when it still has
+            pending symbols, so a job resumed on the next day continues, otherwise it uses the current date.
+        output_dir : str, optional
+            The directory where the history of every symbol is written ({symbol}.csv).
+        state_file : str, optional
+            The file where the progress is saved.  A job started with the same file and dates downloads only
+            the symbols not completed.  None uses output_dir/state.json.
+        max_workers : int, optional
+            The maximum number of symbols downloaded at the same time.
+        retries : int, optional
+            The number of times a failed symbol is downloaded again before it is marked as failed.
+        retry_delay : float, optional
+            The number of seconds before the first retry.  It is doubled in every retry.
+        boards : list of str, optional
+            The boards used to list the symbols (bluechips, general_board, cedears, government_bonds,
+            short_term_government_bonds, corporate_bonds).  None uses all of them.
+        include_options : bool, optional
+            If the symbols of the options board should be downloaded.
+        on_result : function(symbol, quotes), optional
+            Callable object which is called with the dataframe of every symbol downloaded.
+            It is called instead of writing the file when output_dir is not assigned.
+        on_progress : function(completed, total), optional
+            Callable object which is called every time a symbol is completed (downloaded or failed).
+
+        Raises
+        ------
+        ValueError
+            Neither output_dir nor state_file are assigned.
+        """
+
+        if not output_dir and not state_file:
+            raise ValueError('output_dir or state_file must be assigned')
+
+        self.home_broker = home_broker
+        self.from_date = self.__to_date(from_date)
+        self.to_date = self.__to_date(to_date) if to_date else datetime.date.today()
+        self.output_dir = output_dir
+        self.state_file = state_file or os.path.join(output_dir, 'state.json')
+        self.max_workers = max_workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.boards = boards
+        self.include_options = include_options
+        self.on_result = on_result
+        self.on_progress = on_progress
+
+        self.__lock = Lock()
+        self.__fixed_to_date = bool(to_date)
+        self.__state = None
+        self.__saved = 0
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def run(self):
+        """
+        Downloads the symbols not completed in the previous runs, saving the progress after every symbol.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        requests.exceptions.HTTPError
+            There is a problem listing the symbols of the boards.
+
+        Returns
+        -------
+        A dictionary with the number of symbols, the number of symbols completed and the symbols that failed
+        with their error.
+        """
+
+        self.__state = self.__load_state()
+
+        if self.__state is None:
+            self.__state = {
+                'from_date': self.from_date.isoformat(),
+                'to_date': self.to_date.isoformat(),
+                'symbols': self.get_symbols(),
+                'done': [],
+                'failed': {}}
+
+        done = set(self.__state['done'])
+        pending = [symbol for symbol in self.__state['symbols'] if symbol not in done]
+        total = len(self.__state['symbols'])
+
+        logging.info('[HOMEBROKER: EOD] {} symbols, {} pending'.format(total, len(pending)))
+
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+        try:
+            self.__save_state(force=True)
+
+            if pending:
+                with ThreadPoolExecutor(min(self.max_workers, len(pending))) as executor:
+                    futures = {executor.submit(self.__download, symbol): symbol for symbol in pending}
+
+                    try:
+                        for future in as_completed(futures):
+                            self.__complete(futures[future], future.exception())
+
+                            if self.on_progress:
+                                self.on_progress(len(self.__state['done']) + len(self.__state['failed']), total)
+                    except:
+                        # The symbols not started are left pending for the next run
+                        for future in futures:
+                            future.cancel()
+                        raise
+        finally:
+            self.__save_state(force=True)
+
+        return {
+            'symbols': total,
+            'done': len(self.__state['done']),
+            'failed': dict(self.__state['failed'])}
+
+    def get_symbols(self):
+        """
+        Returns the sorted list of symbols of the boards (and the options board).
+        """
+
+        snapshot = self.home_broker.online.get_market_snapshot()
+        symbols = set()
+
+        for board, df in snapshot.items():
+            if board == 'options' and not self.include_options:
+                continue
+
+            if board != 'options' and self.boards and board not in self.boards:
+                continue
+
+            symbols.update(df.index.get_level_values('symbol'))
+
+        return sorted(symbols)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __download(self, symbol):
+
+        delay = self.retry_delay
+
+        for attempt in range(self.retries + 1):
+            try:
+                df = self.home_broker.history.get_daily_history(symbol, self.from_date, self.to_date)
+                break
+            except Exception as ex:
+                if attempt == self.retries:
+                    raise
+
+                logging.debug('[HOMEBROKER: EOD] {} failed ({}), retrying in {}s'.format(symbol, ex, delay))
+                time.sleep(delay)
+                delay *= 2
+
+        if self.output_dir:
+            self.__write_csv(symbol, df)
+
+        if self.on_result:
+            self.on_result(symbol, df)
+
+    def __complete(self, symbol, error):
+
+        with self.__lock:
+            if error:
+                logging.warning('[HOMEBROKER: EOD] {} failed: {}'.format(symbol, error))
+                self.__state['failed'][symbol] = str(error) or type(error).__name__
+            else:
+                self.__state['done'].append(symbol)
+                self.__state['failed'].pop(symbol, None)
+
+        self.__save_state()
+
+    def __load_state(self):
+
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # A state of other dates is not resumed, the history of every symbol would be different
+        if state.get('from_date') != self.from_date.isoformat():
+            return None
+
+        if self.__fixed_to_date and state.get('to_date') != self.to_date.isoformat():
+            return None
+
+        if not self.__fixed_to_date:
+            # A finished job is not resumed, so the next run (Ex. the nightly one) downloads up to the current date
+            completed = set(state.get('done', [])) | set(state.get('failed', {}))
+            if not set(state.get('symbols', [])) - completed:
+                return None
+
+        # The end date was not assigned, so the job keeps the one it started with (a job stopped before midnight
+        # and resumed after it would start over otherwise)
+        try:
+            self.to_date = self.__to_date(state['to_date'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # The symbols that failed in the previous run are downloaded again
+        state['failed'] = {}
+
+        return state
+
+    def __save_state(self, force=False):
+
+        with self.__lock:
+            # The file is written at most once per second, a full universe has thousands of symbols
+            if not force and time.monotonic() - self.__saved < 1:
+                return
+
+            self.__saved = time.monotonic()
+            self.__write_json(self.state_file, self.__state)
+
+    def __write_json(self, path, data):
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # Write to a temporary file and replace the state so an interrupted job never leaves a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.state-')
+
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+
+            os.replace(tmp_path, path)
+        except:
+            os.remove(tmp_path)
+            raise
+
+    def __write_csv(self, symbol, df):
+
+        # The symbols can include characters that are not valid in file names
+        filename = re.sub(r'[^A-Za-z0-9_.-]', '_', symbol) + '.csv'
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.output_dir, prefix='.eod-')
+
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                df.to_csv(f, index=False)
+
+            os.replace(tmp_path, os.path.join(self.output_dir, filename))
+        except:
+            os.remove(tmp_path)
+            raise
+
+    def __to_date(self, value):
+
+        if isinstance(value, str):
+            return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+        return value.date() if isinstance(value, datetime.datetime) else value
+
+def main(args=None):
+    """
+    Runs the end of day download from the command line.
+    """
+
+    parser = argparse.ArgumentParser(description='Downloads the daily history of every symbol listed in the boards.')
+    parser.add_argument('--broker', type=int, required=True, help='The broker id')
+    parser.add_argument('--dni', type=int, required=True, help='The national document identification of the user')
+    parser.add_argument('--user', required=True, help='The username used in the platform')
+    parser.add_argument('--from', dest='from_date', required=True, help='The start date (YYYY-MM-DD)')
+    parser.add_argument('--to', dest='to_date', help='The end date (YYYY-MM-DD), the end date of the unfinished progress or the current date by default')
+    parser.add_argument('--output', required=True, help='The directory where the files are written')
+    parser.add_argument('--state', help='The progress file, output/state.json by default')
+    parser.add_argument('--workers', type=int, default=8, help='The number of symbols downloaded at the same time')
+    parser.add_argument('--retries', type=int, default=3, help='The number of retries of every symbol')
+    parser.add_argument('--boards', nargs='*', help='The boards used to list the symbols, all of them by default')
+    parser.add_argument('--no-options', action='store_true', help='Skip the options board')
+    parser.add_argument('--history-cache', help='The history cache database (Check pyhomebroker.HistoryCache)')
+    parser.add_argument('--verbose', action='store_true', help='Log the progress')
+    args = parser.parse_args(args)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s %(message)s')
+
+    password = os.environ.get('PYHOMEBROKER_PASSWORD') or getpass.getpass('Password: ')
+
+    home_broker = HomeBroker(args.broker, pool_size=max(args.workers, 10), history_cache=args.history_cache)
+    home_broker.auth.login(args.dni, args.user, password, raise_exception=True)
+
+    job = EodDownload(
+        home_broker,
+        args.from_date,
+        args.to_date,
+        output_dir=args.output,
+        state_file=args.state,
+        max_workers=args.workers,
+        retries=args.retries,
+        boards=args.boards,
+        include_options=not args.no_options)
+
+    result = job.run()
+
+    print('{} symbols, {} downloaded, {} failed'.format(result['symbols'], result['done'], len(result['failed'])))
+
+    for symbol, error in sorted(result['failed'].items()):
+        print('  {}: {}'.format(symbol, error))
+
+    return 1 if result['failed'] else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
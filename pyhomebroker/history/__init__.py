@@ -19,4 +19,8 @@
 # limitations under the License.
 #
 
-from .history import History
\ No newline at end of file
+from .history_core import HistoryCore
+from .history_cache import HistoryCache
+from .history_memory_cache import HistoryMemoryCache
+from .history import History
+from .history_async import AsyncHistory
\ No newline at end of file
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import user_agent, json_loads, market_calendar, SessionException, PRIORITY_HISTORY
+from .history_core import HistoryCore
+
+import asyncio
+
+class AsyncHistory(HistoryCore):
+
+    def __init__(self, auth, calendar=False, compact=False):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        auth : async_home_broker_session
+            An object with the authentication information.
+        calendar : bool or pyhomebroker.MarketCalendar, optional
+            The market calendar used to skip the chunks without sessions in the history generators.
+            True uses the default calendar (check MarketCalendar for the days it does not know).
+            False (default) requests every chunk.
+        compact : bool, optional
+            If the dataframes should use compact types with a fixed type by column
+            (datetime64 dates instead of python dates and categorical symbols).  (Check pyhomebroker.common.compact_dataframe)
+        """
+
+        self._auth = auth
+        self.calendar = market_calendar if calendar is True else calendar or None
+        self.compact = compact
+
+########################
+#### PUBLIC METHODS ####
+########################
+    async def get_daily_history(self, symbol, from_date, to_date, resolution='D'):
+        """
+        Returns the historical quotes of the specified ticker narroweed by the date.
+
+        Parameters
+        ----------
+        symbol : str
+            The name of the symbol used to retrieve the information.
+        from_date : datetime
+            The start date used to filter the information.
+        to_date : datetime
+            The end date used to filter the information.
+        resolution : str, optional
+            The bars resolution: D (daily), W (weekly) or M (monthly).
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+        """
+
+        source = self.get_source_resolution(resolution, intraday=False)
+        url, data = await self.__get_history(symbol, source, *self.get_daily_history_range(from_date, to_date))
+
+        with self._auth.measure(url, 'build_seconds'):
+            return self.process_daily_history(self.resample_history(data, resolution))
+
+    async def get_intraday_history(self, symbol, from_date=None, to_date=None, chunk_days=1, max_workers=4, on_progress=None, resolution='1'):
+        """
+        Returns the historical quotes of the specified ticker narroweed by the date.
+
+        Parameters
+        ----------
+        symbol : str
+            The name of the symbol used to retrieve the information.
+        from_date : datetime
+            The start date (Argentina Time Zone) used to filter the information.
+        to_date : datetime
+            The end date (Argentina Time Zone) used to filter the information.
+        chunk_days : float, optional
+            The number of days requested by each request.  Longer ranges are split in windows downloaded
+            concurrently and stitched in a single dataframe.  None requests the whole range at once.
+        max_workers : int, optional
+            The maximum number of windows downloaded at the same time.
+        on_progress : function(completed, total), optional
+            Callable object which is called every time a window is downloaded. (Check History.get_intraday_history)
+        resolution : str, optional
+            The bars resolution in minutes. Ex. 1, 5, 15, 60
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+        """
+
+        source = self.get_source_resolution(resolution, intraday=True)
+        from_epoch, to_epoch = self.get_intraday_history_range(from_date, to_date)
+        chunk_seconds = int(chunk_days * 86400) if chunk_days else None
+
+        url, data = await self.__get_history(symbol, source, from_epoch, to_epoch, chunk_seconds, max_workers, on_progress)
+
+        with self._auth.measure(url, 'build_seconds'):
+            return self.process_intraday_history(self.resample_history(data, resolution))
+
+    async def get_daily_history_many(self, symbols, from_date, to_date, max_workers=10, wide=False, resolution='D'):
+        """
+        Returns the historical quotes of several tickers narroweed by the date, downloaded concurrently.
+        (Check History.get_daily_history_many)
+
+        Returns
+        -------
+        A tuple with the dataframe of the symbols downloaded and a dictionary with the symbols that failed
+        and their exception.
+        """
+
+        return await self.__get_history_many(
+            symbols,
+            lambda symbol: self.get_daily_history(symbol, from_date, to_date, resolution),
+            max_workers,
+            wide)
+
+    async def get_intraday_history_many(self, symbols, from_date=None, to_date=None, max_workers=10, wide=False, resolution='1'):
+        """
+        Returns the intraday quotes of several tickers narroweed by the date, downloaded concurrently.
+        (Check History.get_daily_history_many)
+
+        Returns
+        -------
+        A tuple with the dataframe of the symbols downloaded and a dictionary with the symbols that failed
+        and their exception.
+        """
+
+        return await self.__get_history_many(
+            symbols,
+            lambda symbol: self.get_intraday_history(symbol, from_date, to_date, resolution=resolution),
+            max_workers,
+            wide)
+
+    def iter_daily_history(self, symbol, from_date, to_date, chunk_days=365):
+        """
+        Returns an asynchronous generator of the historical quotes split in dataframes of chunk_days.
+        (Check History.iter_daily_history)
+        """
+
+        from_epoch, to_epoch = self.get_daily_history_range(from_date, to_date)
+
+        return self.__iter_history(symbol, 'D', 'D', from_epoch, to_epoch, chunk_days, self.process_daily_history)
+
+    def iter_intraday_history(self, symbol, from_date=None, to_date=None, chunk_days=1, resolution='1'):
+        """
+        Returns an asynchronous generator of the intraday quotes split in dataframes of chunk_days.
+        (Check History.iter_intraday_history)
+        """
+
+        source = self.get_source_resolution(resolution, intraday=True)
+        from_epoch, to_epoch = self.get_intraday_history_range(from_date, to_date)
+
+        return self.__iter_history(symbol, source, resolution, from_epoch, to_epoch, chunk_days, self.process_intraday_history)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    async def __iter_history(self, symbol, source, resolution, from_epoch, to_epoch, chunk_days, process):
+
+        if not self._auth.is_user_logged_in:
+            raise SessionException('User is not logged in')
+
+        headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+
+        last_date = None
+
+        windows = self.split_history_range(from_epoch, to_epoch + 1, int(chunk_days * 86400))
+
+        for start, end in self.filter_history_windows(windows, source, self.calendar):
+            url = self.get_history_url(symbol, source, start, end - 1)
+
+            resp = await self._auth.get(url, headers=headers, idempotent=True, priority=PRIORITY_HISTORY)
+
+            with self._auth.measure(url, 'decode_seconds'):
+                data = json_loads(resp.content)
+
+            # A chunk without bars only returns the status ({"s": "no_data"}), so it is merged to get the empty columns
+            with self._auth.measure(url, 'build_seconds'):
+                df = process(self.resample_history(self.merge_history_data([data]), resolution))
+
+            # The document is released before the consumer receives the chunk
+            del data, resp
+
+            # Bars returned again at the seam of two chunks are only yielded once
+            if last_date is not None:
+                df = df[df.date > last_date]
+
+            if len(df):
+                last_date = df.date.iloc[-1]
+                yield df
+
+    async def __get_history(self, symbol, resolution, from_epoch, to_epoch, chunk_seconds=None, max_workers=1, on_progress=None):
+
+        if not self._auth.is_user_logged_in:
+            raise SessionException('User is not logged in')
+
+        url = self.get_history_url(symbol, resolution, from_epoch, to_epoch)
+
+        # The broker range includes both limits, and the windows do not include the end
+        windows = self.split_history_range(from_epoch, to_epoch + 1, chunk_seconds)
+        windows = self.filter_history_windows(windows, resolution, self.calendar)
+
+        semaphore = asyncio.Semaphore(max(max_workers, 1))
+        completed = 0
+
+        async def download(window):
+            nonlocal completed
+
+            async with semaphore:
+                data = await self.__download_history(self.get_history_url(symbol, resolution, window[0], window[1] - 1))
+
+            completed += 1
+            if on_progress:
+                on_progress(completed, len(windows))
+
+            return data
+
+        datas = await asyncio.gather(*[download(window) for window in windows])
+
+        # Every result is merged, so a window without bars (no_data) returns the same document as many of them
+        return url, self.merge_history_data(datas)
+
+    async def __download_history(self, url):
+
+        headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+
+        resp = await self._auth.get(url, headers=headers, idempotent=True, priority=PRIORITY_HISTORY)
+
+        with self._auth.measure(url, 'decode_seconds'):
+            return json_loads(resp.content)
+
+    async def __get_history_many(self, symbols, fn, max_workers, wide):
+
+        if not self._auth.is_user_logged_in:
+            raise SessionException('User is not logged in')
+
+        symbols = list(dict.fromkeys(symbols))
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def download(symbol):
+            async with semaphore:
+                try:
+                    return await fn(symbol)
+                except Exception as ex:
+                    return ex
+
+        results = await asyncio.gather(*[download(symbol) for symbol in symbols])
+
+        histories = {symbol: result for symbol, result in zip(symbols, results) if not isinstance(result, Exception)}
+        errors = {symbol: result for symbol, result in zip(symbols, results) if isinstance(result, Exception)}
+
+        return self.process_history_many(histories, wide), errors
@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from contextlib import closing
+
+import os
+import sqlite3
+
+import numpy as np
+
+class HistoryCache:
+
+    __columns = ['t', 'o', 'h', 'l', 'c', 'v']
+
+    def __init__(self, path, timeout=30):
+        """
+        Class constructor.
+
+        A SQLite database with the bars already downloaded by symbol and resolution, and the
+        date ranges they cover, so only the missing ranges are requested to the broker.
+        The database can be used by several threads and processes at the same time.
+
+        Parameters
+        ----------
+        path : str
+            The database file.  It is created if it does not exist.
+        timeout : float, optional
+            The number of seconds to wait for other process that is writing the database.
+        """
+
+        self.path = path
+        self.timeout = timeout
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        with closing(self.__connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    date INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume INTEGER,
+                    PRIMARY KEY (symbol, resolution, date)
+                ) WITHOUT ROWID''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS ranges (
+                    symbol TEXT NOT NULL,
+                    resolution TEXT NOT NULL,
+                    start INTEGER NOT NULL,
+                    end INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, resolution, start)
+                ) WITHOUT ROWID''')
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get_gaps(self, symbol, resolution, start, end):
+        """
+        Returns the ranges not covered by the cache.
+
+        Parameters
+        ----------
+        symbol : str
+            The asset symbol.
+        resolution : str
+            The bars resolution. Ex. D (daily), 1 (one minute)
+        start : int
+            The range start (epoch seconds, included).
+        end : int
+            The range end (epoch seconds, not included).
+
+        Returns
+        -------
+        A list of (start, end) tuples with the missing ranges.
+        """
+
+        with closing(self.__connect()) as conn:
+            ranges = conn.execute(
+                'SELECT start, end FROM ranges WHERE symbol = ? AND resolution = ? AND end > ? AND start < ? ORDER BY start',
+                (symbol.upper(), resolution, start, end)).fetchall()
+
+        gaps = []
+        position = start
+
+        for range_start, range_end in ranges:
+            if range_start > position:
+                gaps.append((position, range_start))
+
+            position = max(position, range_end)
+
+        if position < end:
+            gaps.append((position, end))
+
+        return gaps
+
+    def store(self, symbol, resolution, start, end, data, cutoff=None):
+        """
+        Stores the bars downloaded for a range and marks the range as covered.
+
+        Parameters
+        ----------
+        symbol : str
+            The asset symbol.
+        resolution : str
+            The bars resolution.
+        start : int
+            The range start (epoch seconds, included).
+        end : int
+            The range end (epoch seconds, not included).
+        data : dict
+            The history document returned by the broker (t, o, h, l, c and v lists).
+        cutoff : int, optional
+            The epoch from which the bars can still change.  The range is only covered until it,
+            so the bars after it are requested again.
+        """
+
+        symbol = symbol.upper()
+        rows = zip(*[data.get(column) or [] for column in self.__columns])
+
+        covered_end = min(end, cutoff) if cutoff is not None else end
+
+        with closing(self.__connect()) as conn:
+            # Take the write lock before reading the ranges, so other process cannot merge them at the same time
+            conn.execute('BEGIN IMMEDIATE')
+
+            try:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    ((symbol, resolution, int(t), o, h, l, c, v) for t, o, h, l, c, v in rows))
+
+                if covered_end > start:
+                    self.__add_range(conn, symbol, resolution, start, covered_end)
+
+                conn.execute('COMMIT')
+            except:
+                conn.execute('ROLLBACK')
+                raise
+
+    def load(self, symbol, resolution, start, end):
+        """
+        Returns the bars of a range.
+
+        Parameters
+        ----------
+        symbol : str
+            The asset symbol.
+        resolution : str
+            The bars resolution.
+        start : int
+            The range start (epoch seconds, included).
+        end : int
+            The range end (epoch seconds, not included).
+
+        Returns
+        -------
+        A dictionary with the same format than the broker history document (t, o, h, l, c and v arrays).
+        """
+
+        with closing(self.__connect()) as conn:
+            rows = conn.execute(
+                'SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ? AND resolution = ? AND date >= ? AND date < ? ORDER BY date',
+                (symbol.upper(), resolution, start, end)).fetchall()
+
+        values = np.array(rows, dtype=np.float64).reshape(-1, len(self.__columns))
+
+        return {column: values[:, index] for index, column in enumerate(self.__columns)}
+
+    def clear(self, symbol=None, resolution=None):
+        """
+        Removes the bars and ranges of a symbol and resolution (or all of them).
+
+        Parameters
+        ----------
+        symbol : str, optional
+            The asset symbol.  None removes every symbol.
+        resolution : str, optional
+            The bars resolution.  None removes every resolution.
+        """
+
+        condition = 'WHERE (? IS NULL OR symbol = ?) AND (? IS NULL OR resolution = ?)'
+        symbol = symbol.upper() if symbol else None
+        params = (symbol, symbol, resolution, resolution)
+
+        with closing(self.__connect()) as conn, conn:
+            conn.execute('DELETE FROM bars ' + condition, params)
+            conn.execute('DELETE FROM ranges ' + condition, params)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __connect(self):
+
+        # A connection by operation, so the cache can be used from any thread
+        return sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+
+    def __add_range(self, conn, symbol, resolution, start, end):
+
+        # Merge the new range with the ranges it overlaps or touches
+        ranges = conn.execute(
+            'SELECT start, end FROM ranges WHERE symbol = ? AND resolution = ? AND end >= ? AND start <= ?',
+            (symbol, resolution, start, end)).fetchall()
+
+        for range_start, range_end in ranges:
+            start = min(start, range_start)
+            end = max(end, range_end)
+
+        conn.execute(
+            'DELETE FROM ranges WHERE symbol = ? AND resolution = ? AND end >= ? AND start <= ?',
+            (symbol, resolution, start, end))
+        conn.execute('INSERT INTO ranges VALUES (?, ?, ?, ?)', (symbol, resolution, start, end))
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import compact_dataframe, DataException
+
+from abc import ABCMeta
+
+import datetime
+import math
+
+import numpy as np
+import pandas as pd
+
+class HistoryCore(object, metaclass=ABCMeta):
+
+    # Difference between UTC & Argentina Time Zone
+    __hours = 3
+
+    # Market opening (Argentina Time Zone), the intraday bars are aligned to it
+    __session_open = 11 * 3600
+
+    __daily_resolutions = ['D', 'W', 'M']
+
+    # Resolutions returned by the broker, the others are resampled from the 1 minute or daily bars
+    native_resolutions = ('1', 'D')
+
+    # If the dataframes use compact types (datetime64, categoricals)
+    compact = False
+
+##########################
+#### REQUEST BUILDERS ####
+##########################
+    def get_daily_history_url(self, symbol, from_date, to_date):
+
+        return self.get_history_url(symbol, 'D', *self.get_daily_history_range(from_date, to_date))
+
+    def get_intraday_history_url(self, symbol, from_date=None, to_date=None):
+
+        return self.get_history_url(symbol, '1', *self.get_intraday_history_range(from_date, to_date))
+
+    def get_history_url(self, symbol, resolution, from_epoch, to_epoch):
+
+        return '{}?symbol={}&resolution={}&from={}&to={}'.format(
+            '/HistoricoPrecios/history' if resolution in self.__daily_resolutions else '/Intradiario/history',
+            symbol.upper(),
+            resolution,
+            from_epoch,
+            to_epoch)
+
+    def get_daily_history_range(self, from_date, to_date):
+
+        return (
+            self.__convert_datetime_to_epoch(from_date),
+            self.__convert_datetime_to_epoch(to_date))
+
+    def get_intraday_history_range(self, from_date=None, to_date=None):
+
+        if from_date == None:
+            from_date = datetime.date.today()
+
+        if to_date == None:
+            to_date = from_date + datetime.timedelta(days=1)
+
+        from_date = from_date + datetime.timedelta(seconds=self.__hours * 3600)
+        to_date = to_date + datetime.timedelta(seconds=self.__hours * 3600)
+
+        return (
+            self.__convert_datetime_to_epoch(from_date),
+            self.__convert_datetime_to_epoch(to_date))
+
+    def get_history_cutoff(self, resolution):
+
+        # The bars of the current trading day can still change, so they are not considered complete
+        today = (datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=self.__hours)).date()
+        cutoff = self.__convert_datetime_to_epoch(today)
+
+        return cutoff if resolution in self.__daily_resolutions else cutoff + self.__hours * 3600
+
+    def get_source_resolution(self, resolution, intraday):
+
+        resolution = str(resolution).upper()
+
+        if intraday and not (resolution.isdigit() and int(resolution) > 0):
+            raise DataException('Intraday resolution is not valid')
+
+        if not intraday and resolution not in self.__daily_resolutions:
+            raise DataException('Daily resolution is not valid')
+
+        if resolution in self.native_resolutions:
+            return resolution
+
+        return '1' if intraday else 'D'
+
+    def filter_history_windows(self, windows, resolution, calendar):
+
+        if not calendar:
+            return windows
+
+        intraday = resolution not in self.__daily_resolutions
+
+        return [window for window in windows if calendar.has_sessions(window[0], window[1], intraday)]
+
+    def split_history_range(self, start, end, seconds=None):
+
+        if not seconds:
+            return [(start, end)]
+
+        # The last window takes the remainder, so a range of exactly one window is not split in two
+        count = max(math.ceil((end - 1 - start) / seconds), 1)
+        bounds = [start + index * seconds for index in range(count)] + [end]
+
+        return list(zip(bounds[:-1], bounds[1:]))
+
+############################
+## PROCESS JSON DOCUMENTS ##
+############################
+    def resample_history(self, data, resolution):
+
+        resolution = str(resolution).upper()
+        columns = ['t', 'o', 'h', 'l', 'c', 'v']
+
+        if resolution in self.native_resolutions or not len(data.get('t', [])):
+            return data
+
+        t = np.asarray(data['t'], dtype=np.int64)
+        order = np.argsort(t, kind='stable')
+        values = {column: np.asarray(data[column], dtype=np.float64)[order] for column in columns[1:]}
+        t = t[order]
+
+        if resolution.isdigit():
+            # The buckets are aligned to the market opening of every day, so a bar never mixes two sessions
+            seconds = int(resolution) * 60
+            local = t - self.__hours * 3600
+            day = local - local % 86400
+            keys = day + self.__session_open + (local - day - self.__session_open) // seconds * seconds
+            keys = keys + self.__hours * 3600
+        elif resolution == 'W':
+            days = t // 86400
+            keys = days - (days + 3) % 7 # 1970-01-01 was thursday, the weeks start on monday
+        else:
+            keys = t.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(t)] - 1
+
+        return {
+            # The minute bars are labeled with the bucket start, the weekly and monthly bars with their first session
+            't': keys[starts] if resolution.isdigit() else t[starts],
+            'o': values['o'][starts],
+            'h': np.maximum.reduceat(values['h'], starts),
+            'l': np.minimum.reduceat(values['l'], starts),
+            'c': values['c'][ends],
+            'v': np.add.reduceat(values['v'], starts)}
+
+    def merge_history_data(self, datas):
+
+        columns = ['t', 'o', 'h', 'l', 'c', 'v']
+        datas = [data for data in datas if len(data.get('t', []))]
+
+        if not datas:
+            return {column: [] for column in columns}
+
+        values = {column: np.concatenate([np.asarray(data[column]) for data in datas]) for column in columns}
+
+        # Keep the last bar of every date, so the bars repeated at the seams of the windows appear once
+        _, index = np.unique(values['t'][::-1], return_index=True)
+        index = len(values['t']) - 1 - index
+
+        return {column: value[index] for column, value in values.items()}
+
+    def process_daily_history(self, data):
+
+        df = self.__create_history_dataframe(data)
+
+        if self.compact:
+            df.date = pd.to_datetime(df.date, unit='s')
+            return compact_dataframe(df)
+
+        df.date = pd.to_datetime(df.date, unit='s').dt.date
+
+        return df
+
+    def process_intraday_history(self, data):
+
+        df = self.__create_history_dataframe(data)
+        df.date = pd.to_datetime(df.date, unit='s') - pd.DateOffset(seconds=self.__hours * 3600)
+
+        return compact_dataframe(df) if self.compact else df
+
+    def process_history_many(self, histories, wide=False):
+
+        symbols = list(histories.keys())
+        frames = list(histories.values())
+
+        if frames:
+            df = pd.concat(frames, ignore_index=True)
+        else:
+            df = self.__create_history_dataframe({'t': [], 'o': [], 'h': [], 'l': [], 'c': [], 'v': []})
+
+        # The symbol column is built at once instead of assigning it to every dataframe before the concat
+        df.insert(0, 'symbol', np.repeat(symbols, [len(frame) for frame in frames]).astype(object))
+        df = df.set_index(['symbol', 'date'])
+
+        if wide:
+            df = df.close.unstack('symbol').reindex(columns=symbols)
+
+        # A symbol that needs float64 changes the type of the whole column, so the types are checked again
+        return compact_dataframe(df) if self.compact else df
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __create_history_dataframe(self, data):
+
+        # The columns are converted to typed arrays at once, so pandas does not infer the type of every value
+        # A range without bars only returns the status ({"s": "no_data"}), so the missing columns are empty
+        return pd.DataFrame({
+            'date': np.asarray(data.get('t', []), dtype=np.int64),
+            'open': np.asarray(data.get('o', []), dtype=np.float64),
+            'high': np.asarray(data.get('h', []), dtype=np.float64),
+            'low': np.asarray(data.get('l', []), dtype=np.float64),
+            'close': np.asarray(data.get('c', []), dtype=np.float64),
+            'volume': np.asarray(data.get('v', []), dtype=np.int64)})
+
+    def __convert_datetime_to_epoch(self, dt):
+
+        if isinstance(dt, str):
+            dt = datetime.datetime.strptime(dt, '%Y-%m-%d')
+
+        dt_zero = datetime.date(1970, 1, 1)
+        time_delta = dt - dt_zero
+        return int(time_delta.total_seconds())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from collections import OrderedDict
+from threading import Lock
+
+import time
+
+import numpy as np
+import pandas as pd
+
+class HistoryMemoryCache:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttl=30, closed_ttl=3600):
+        """
+        Class constructor.
+
+        An in-process cache of the history dataframes, evicted by age and by total size.
+
+        Parameters
+        ----------
+        max_bytes : int, optional
+            The maximum number of bytes used by the dataframes.  The least recently used are evicted first.
+        ttl : float, optional
+            The number of seconds a result that includes the current trading day is kept.
+        closed_ttl : float, optional
+            The number of seconds a result of closed trading days is kept.
+        """
+
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.closed_ttl = closed_ttl
+
+        self.__lock = Lock()
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def get(self, key, create, closed=False):
+        """
+        Returns the dataframe of the key, creating it when it is not in the cache or it is expired.
+
+        Parameters
+        ----------
+        key : hashable
+            The key that identifies the query.
+        create : function()
+            The function that returns the dataframe when it is not in the cache.
+        closed : bool, optional
+            If the query only includes closed trading days, so the result is kept for closed_ttl seconds.
+
+        Returns
+        -------
+        A dataframe that shares the data of the cached one.  Without copy on write (pandas < 3) its arrays are
+        read only, so it must be copied (df.copy()) before changing its values in place.
+        """
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry and entry.expires > time.monotonic():
+                self.__entries.move_to_end(key)
+                self.__hits += 1
+                return self.__copy(entry.df)
+
+            self.__misses += 1
+
+        df = create()
+
+        with self.__lock:
+            self.__remove(key)
+
+            size = int(df.memory_usage(index=True, deep=True).sum())
+
+            if size <= self.max_bytes:
+                self.__freeze(df)
+
+                expires = time.monotonic() + (self.closed_ttl if closed else self.ttl)
+                self.__entries[key] = _Entry(df, size, expires)
+                self.__bytes += size
+
+                while self.__bytes > self.max_bytes:
+                    self.__remove(next(iter(self.__entries)))
+                    self.__evictions += 1
+
+        return self.__copy(df)
+
+    def get_stats(self):
+        """
+        Returns the number of hits, misses, evictions, entries and bytes used.
+        """
+
+        with self.__lock:
+            return {
+                'hits': self.__hits,
+                'misses': self.__misses,
+                'evictions': self.__evictions,
+                'entries': len(self.__entries),
+                'bytes': self.__bytes}
+
+    def clear(self):
+        """
+        Removes all the dataframes.
+        """
+
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __remove(self, key):
+
+        entry = self.__entries.pop(key, None)
+
+        if entry:
+            self.__bytes -= entry.size
+
+    def __copy(self, df):
+
+        # A shallow copy shares the arrays of the cached dataframe.  With copy on write (always enabled since
+        # pandas 3) the data is only copied when the caller modifies it, otherwise the arrays are read only
+        return df.copy(deep=False)
+
+    def __freeze(self, df):
+
+        if self.__is_copy_on_write():
+            return
+
+        # Without copy on write a modification in place would change the cached dataframe, so it raises instead
+        # (a deep copy in every hit would cost more than the download it saves)
+        for values in df._mgr.arrays:
+            values = getattr(values, '_ndarray', values)
+
+            if isinstance(values, np.ndarray):
+                values.setflags(write=False)
+
+    def __is_copy_on_write(self):
+
+        return int(pd.__version__.split('.')[0]) >= 3 or getattr(pd.options.mode, 'copy_on_write', False) is True
+
+class _Entry:
+
+    def __init__(self, df, size, expires):
+
+        self.df = df
+        self.size = size
+        self.expires = expires
@@ -0,0 +1,296 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from .common import get_public_ipaddress, DataException
+from .home_broker import HomeBroker
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event, Lock, Thread
+
+import logging
+import requests as rq
+
+class HomeBrokerPool:
+
+    def __init__(self, max_workers=10, health_interval=None, ipaddress=None, **kwargs):
+        """
+        Class constructor.
+        The pool keeps one HomeBroker by account and logs them in concurrently.
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            The maximum number of accounts logged in (or checked) at the same time.
+        health_interval : float, optional
+            The number of seconds between the checks of the sessions in background.
+            The accounts with an expired session are logged in again.  None disables the checks.
+        ipaddress : str, optional
+            The public ip address sent in the login of every account.
+            When it is not assigned, it is retrieved once and shared by all the accounts.
+        **kwargs
+            Any other argument accepted by HomeBroker (proxy_url, pool_size, session_store, rate_limiter, etc.)
+            It is used to create the HomeBroker of every account.
+        """
+
+        self.max_workers = max_workers
+        self.health_interval = health_interval
+
+        self.__ipaddress = ipaddress
+        self.__options = kwargs
+        self.__accounts = {}
+        self.__lock = Lock()
+
+        self.__health_thread = None
+        self.__health_event = Event()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def add_account(self, broker_id, dni, user, password):
+        """
+        Adds an account to the pool.  The account is logged in with the login method.
+
+        Parameters
+        ----------
+        broker_id : int
+            The broker identification (Check brokers.py).
+        dni : int
+            The national document identification of the user.
+        user : str
+            The username used in the platform.
+        password : str
+            The password used in the platform.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.DataException
+            The account was already added.
+        pyhomebroker.exceptions.BrokerNotSupportedException
+            The broker_id is not in the list of supported brokers.
+
+        Returns
+        -------
+        The account key (broker_id, dni, user).
+        """
+
+        key = (broker_id, dni, user)
+
+        with self.__lock:
+            if key in self.__accounts:
+                raise DataException('Account {} already added'.format(key))
+
+            self.__accounts[key] = _Account(HomeBroker(broker_id, ipaddress=self.__ipaddress, **self.__options), password)
+
+        return key
+
+    def login(self, raise_exception=False):
+        """
+        Logs in concurrently every account that is not logged in.
+
+        Parameters
+        ----------
+        raise_exception : bool
+            If the method should raise the first error after trying to log in every account.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            An account cannot be authenticated.
+        requests.exceptions.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        A dictionary with the account key and True if the account is logged in, otherwise False.
+        """
+
+        accounts = {key: account for key, account in self.__get_accounts() if not account.home_broker.auth.is_user_logged_in}
+
+        self.__resolve_ipaddress(accounts)
+
+        results = self.__run(accounts, self.__login_account)
+
+        self.__start_health_thread()
+
+        errors = [result for result in results.values() if isinstance(result, Exception)]
+        if raise_exception and errors:
+            raise errors[0]
+
+        return {key: account.home_broker.auth.is_user_logged_in for key, account in self.__get_accounts()}
+
+    def check_health(self):
+        """
+        Checks concurrently the session of every account and logs in again the expired ones and the ones
+        not logged in (Ex. the first login failed).
+
+        Returns
+        -------
+        A dictionary with the account key and True if the session is valid, otherwise False.
+        """
+
+        accounts = dict(self.__get_accounts())
+
+        self.__resolve_ipaddress({key: account for key, account in accounts.items() if not account.logged_in})
+
+        results = self.__run(accounts, self.__check_account)
+
+        return {key: result is True for key, result in results.items()}
+
+    def get_home_broker(self, broker_id, dni, user):
+        """
+        Returns the HomeBroker of an account.
+
+        Parameters
+        ----------
+        broker_id : int
+            The broker identification.
+        dni : int
+            The national document identification of the user.
+        user : str
+            The username used in the platform.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.DataException
+            The account is not in the pool.
+        """
+
+        with self.__lock:
+            account = self.__accounts.get((broker_id, dni, user))
+
+        if not account:
+            raise DataException('Account {} not found'.format((broker_id, dni, user)))
+
+        return account.home_broker
+
+    def get_accounts(self):
+        """
+        Returns the list of account keys (broker_id, dni, user).
+        """
+
+        return [key for key, _ in self.__get_accounts()]
+
+    def close(self):
+        """
+        Stops the health checks and closes the session of every account.
+        """
+
+        self.__health_event.set()
+
+        if self.__health_thread:
+            self.__health_thread.join()
+            self.__health_thread = None
+
+        for _, account in self.__get_accounts():
+            account.home_broker.auth.close()
+
+    def __getitem__(self, key):
+
+        return self.get_home_broker(*key)
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+
+        self.close()
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __get_accounts(self):
+
+        with self.__lock:
+            return list(self.__accounts.items())
+
+    def __resolve_ipaddress(self, accounts):
+
+        if not accounts or self.__ipaddress:
+            return
+
+        proxy_url = self.__options.get('proxy_url')
+
+        try:
+            with rq.Session() as session:
+                if proxy_url:
+                    session.proxies.update({'http': proxy_url, 'https': proxy_url})
+
+                self.__ipaddress = get_public_ipaddress(session, self.__options.get('timeout', (5, 30)))
+        except Exception as ex:
+            # Every account looks the ip up in its login, so the error is recorded in the result of each one
+            logging.debug('[HOMEBROKER: POOL] The public ip address cannot be retrieved ({})'.format(ex))
+            return
+
+        # The sessions created before the ip was known receive it here, so they do not look it up again
+        for _, account in self.__get_accounts():
+            account.home_broker.auth.ipaddress = account.home_broker.auth.ipaddress or self.__ipaddress
+
+    def __run(self, accounts, fn):
+
+        if not accounts:
+            return {}
+
+        with ThreadPoolExecutor(min(self.max_workers, len(accounts))) as executor:
+            futures = {key: executor.submit(fn, key, account) for key, account in accounts.items()}
+
+        return {key: future.exception() or future.result() for key, future in futures.items()}
+
+    def __login_account(self, key, account):
+
+        _, dni, user = key
+
+        try:
+            account.logged_in = account.home_broker.auth.login(dni, user, account.password, raise_exception=True)
+        except:
+            account.logged_in = False
+            raise
+
+        return account.logged_in
+
+    def __check_account(self, key, account):
+
+        if account.home_broker.auth.check_session():
+            return True
+
+        return self.__login_account(key, account)
+
+    def __start_health_thread(self):
+
+        if not self.health_interval or self.__health_thread:
+            return
+
+        self.__health_event.clear()
+        self.__health_thread = Thread(target=self.__health_thread_run, daemon=True)
+        self.__health_thread.start()
+
+    def __health_thread_run(self):
+
+        while not self.__health_event.wait(self.health_interval):
+            self.check_health()
+
+class _Account:
+
+    def __init__(self, home_broker, password):
+
+        self.home_broker = home_broker
+        self.password = password
+        self.logged_in = False
@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from .common import user_agent, SessionException, SessionStore, HedgePolicy, Metrics
+
+from pyquery import PyQuery as pq
+from abc import ABCMeta
+from contextlib import nullcontext
+
+import json
+import urllib.parse
+
+_no_measure = nullcontext()
+
+class HomeBrokerSessionCore(object, metaclass=ABCMeta):
+
+    def __init__(self, broker, session_store=None, relogin=True, timeout=(5, 30), hedge=None, ipaddress=None, metrics=None):
+        """
+        Class constructor.  The state shared by the sync and async sessions. (Check HomeBrokerSession)
+        """
+
+        self.broker = broker
+        self.timeout = timeout
+        self.hedge_policy = HedgePolicy() if hedge is True else hedge or None
+        self.metrics = Metrics() if metrics is True else metrics or None
+
+        self.is_user_logged_in = False
+        self.cookies = {}
+        self.ipaddress = ipaddress
+
+        self._session_store = SessionStore(session_store) if isinstance(session_store, str) else session_store
+        self._relogin = relogin
+        self._credentials = None
+        self._account = None
+        self._login_generation = 0
+
+########################
+#### PUBLIC METHODS ####
+########################
+    def measure(self, path, name):
+        """
+        Returns a context manager that records the seconds spent in the block for the endpoint.
+        It does nothing when the metrics are disabled.
+
+        Parameters
+        ----------
+        path : str
+            The path of the endpoint (the query string is ignored). Ex. /Prices/GetByPanel
+        name : str
+            The metric name. Ex. decode_seconds, build_seconds
+        """
+
+        return self.metrics.measure(path.split('?', 1)[0], name) if self.metrics else _no_measure
+
+##########################
+#### REQUEST BUILDERS ####
+##########################
+    def get_url(self, path):
+
+        return '{}{}'.format(self.broker['page'], path)
+
+    def get_coalesce_key(self, method, url, **kwargs):
+
+        return (method.upper(), url, json.dumps(
+            [kwargs.get('params'), kwargs.get('data'), kwargs.get('content'), kwargs.get('json')], sort_keys=True, default=str))
+
+    def get_login_request(self, dni, user, password, ipaddress, alternative=False):
+        """
+        Returns the url, the payload and the headers of the login.
+        The alternative login is used by the brokers that answer the main one with an Internal Server Error.
+        """
+
+        payload = {
+            'IpAddress': ipaddress,
+            'Dni': dni,
+            'Usuario': user,
+            'Password': password}
+
+        if alternative:
+            url = '{}/Login/IngresarModal'.format(self.broker['page'])
+            content_type = 'application/json; charset=utf-8'
+            payload = json.dumps(payload, separators=(',', ':'))
+        else:
+            url = '{}/Login/Ingresar'.format(self.broker['page'])
+            content_type = 'application/x-www-form-urlencoded'
+            payload = urllib.parse.urlencode(payload)
+
+        headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': content_type
+        }
+
+        return url, payload, headers
+
+    def get_hedge_delay(self, endpoint, deadline=None):
+        """
+        Returns the seconds to wait before hedging the request, or None if it should not be hedged.
+        """
+
+        delay = self.hedge_policy.get_delay(endpoint)
+
+        # A duplicate sent when the deadline expires before the delay could never answer in time
+        if delay is None or (deadline and deadline.remaining() <= delay):
+            return None
+
+        return delay
+
+###########################
+#### PROCESS RESPONSES ####
+###########################
+    def process_login_response(self, text):
+
+        doc = pq(text)
+        if doc('#usuarioLogueado'):
+            return
+
+        errormsg = doc('.callout-danger')
+        if errormsg:
+            raise SessionException(errormsg.text())
+
+        raise SessionException('Session cannot be created.  Check the entered information and try again.')
+
+    def process_restored_session_response(self, text):
+
+        if not pq(text)('#usuarioLogueado'):
+            raise SessionException('Stored session rejected by the broker')
+
+    def is_session_expired(self, response):
+
+        if response.status_code == 401:
+            return True
+
+        # The broker redirects to the login page when the cookies are not valid anymore
+        if response.history and '/login' in urllib.parse.urlparse(str(response.url)).path.lower():
+            return True
+
+        # Every endpoint used through request answers json, so an html page means the login page was returned
+        return response.status_code < 400 and response.headers.get('Content-Type', '').startswith('text/html')
+
+    def observe_response(self, endpoint, response):
+
+        self.metrics.observe(endpoint, 'server_seconds', response.elapsed.total_seconds())
+        self.metrics.observe(endpoint, 'response_bytes', len(response.content))
+
+#######################
+#### SESSION STATE ####
+#######################
+    def set_account(self, dni, user, password):
+
+        self._account = (dni, user)
+        self._credentials = (dni, user, password) if self._relogin else None
+
+    def clear_account(self):
+
+        self._account = None
+        self._credentials = None
+
+    def set_logged_in(self, cookies, save=True):
+
+        self.is_user_logged_in = True
+        self.cookies = cookies
+        self._login_generation += 1
+
+        if save and self._session_store and self._account:
+            self._session_store.save(self.broker['broker_id'], *self._account, self.cookies, self.ipaddress)
+
+    def set_logged_out(self):
+
+        self.is_user_logged_in = False
+        self.cookies = {}
+
+    def load_stored_session(self, dni, user):
+        """
+        Returns the stored cookies of the account, or None if there is not a stored session or it is expired.
+        """
+
+        if not self._session_store:
+            return None
+
+        stored = self._session_store.load(self.broker['broker_id'], dni, user)
+        if not stored:
+            return None
+
+        # The ip address is still valid even if the session is not
+        self.ipaddress = self.ipaddress or stored['ipaddress']
+
+        return None if self._session_store.is_expired(stored) else stored['cookies']
+
+    def update_cookies(self, cookies):
+        """
+        Keeps the cookies renewed by the broker in any response, so a restored session uses them.
+        """
+
+        if cookies == self.cookies:
+            return
+
+        self.cookies = cookies
+
+        if self._session_store and self._account:
+            self._session_store.save(self.broker['broker_id'], *self._account, self.cookies, self.ipaddress)
+
+    def get_renewal_credentials(self, generation):
+        """
+        Returns the credentials used to renew the session that expired in the login generation,
+        or None if other request already renewed it.
+        """
+
+        # Other request renewed the session while this one was waiting, so it only needs to be replayed
+        if generation != self._login_generation:
+            return None
+
+        if not self._credentials:
+            self.is_user_logged_in = False
+            raise SessionException('Session expired')
+
+        return self._credentials
+
+    def release_renewal(self):
+
+        # Release the requests waiting for a login that failed, they will fail when they are replayed
+        self._login_generation += 1
@@ -22,4 +22,5 @@
 from .online_core import OnlineCore
 from .online_scrapping import OnlineScrapping
 from .online_signalr import OnlineSignalR
-from .online import Online
\ No newline at end of file
+from .online import Online
+from .online_async import AsyncOnline
\ No newline at end of file
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import user_agent, json_loads, DataException, SessionException, ServerException
+from .online_core import OnlineCore
+
+import asyncio
+
+import pandas as pd
+
+class AsyncOnline(OnlineCore):
+
+    def __init__(self, auth, compact=False):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        auth : async_home_broker_session
+            An object with the authentication information.
+        compact : bool, optional
+            If the dataframes should use compact types with a fixed type by column
+            (float32 changes, int32 sizes, datetime64 and categoricals for symbols, settlements and groups).
+        """
+
+        self._auth = auth
+        self.compact = compact
+
+########################
+#### PUBLIC METHODS ####
+########################
+    async def get_personal_portfolio(self):
+        """
+        Returns the configured personal portfolio.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        A list with the portfolio dataframe and the order book dataframe.
+        """
+
+        data = await self.__post('/Prices/GetFavoritos')
+
+        with self._auth.measure('/Prices/GetFavoritos', 'build_seconds'):
+            data = data['Result'] if data and data['Result'] else None
+
+            df_portfolio = self.process_personal_portfolio(data)
+            df_order_book = self.process_order_books(data)
+
+            return [df_portfolio, df_order_book]
+
+    async def get_securities(self, board, settlement):
+        """
+        Returns the security board specified by the name and settlement.
+
+        Parameters
+        ----------
+        board : str
+            The name of the board to be retrieved
+            Valid values: bluechips, general_board, cedears, government_bonds, short_term_government_bonds, corporate_bonds
+        settlement : str
+            The settlement of the board to be retrieved
+            Valid values: spot, 24hs, 48hs
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        pyhomebroker.exceptions.DataException
+            When the board name or the settlement is not valid.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        An empty dataframe or a dataframe with the quotes.
+        """
+
+        if not board:
+            raise DataException('Board is not assigned')
+
+        if not settlement:
+            raise DataException('Settlement is not assigned')
+
+        return await self.__get_securities(
+            self.get_board_for_request(board),
+            self.get_settlement_for_request(settlement))
+
+    async def get_options(self):
+        """
+        Returns the options board.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        An empty dataframe or a dataframe with the quotes.
+        """
+
+        data = await self.__post('/Prices/GetByPanel', {'panel': 'opciones', 'term': ''})
+
+        with self._auth.measure('/Prices/GetByPanel', 'build_seconds'):
+            df = pd.DataFrame(data['Result']['Stocks']) if data['Result'] and data['Result']['Stocks'] else pd.DataFrame()
+
+            return self.process_options(df)
+
+    async def get_repos(self):
+        """
+        Returns the repo board.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        An empty dataframe or a dataframe with the repos.
+        """
+
+        data = await self.__post('/Prices/GetByPanel', {'panel': 'cauciones', 'term': ''})
+
+        with self._auth.measure('/Prices/GetByPanel', 'build_seconds'):
+            df = pd.DataFrame(data['Result']['Stocks']) if data['Result'] and data['Result']['Stocks'] else pd.DataFrame()
+
+            return self.process_repos(df)
+
+    async def get_order_book(self, symbol, settlement=None):
+        """
+        Returns the order book (level 2) of the specified symbol and settlement.
+
+        Parameters
+        ----------
+        symbol : str
+            The asset symbol or the repo currency.
+        settlement : str
+            The settlement of the board to be retrieved.
+            Valid values:
+                options: None or empty string.
+                repos: datetime in format %Y%m%d (YYYYMMDD).
+                rest of securities: spot, 24hs, 48hs.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        pyhomebroker.exceptions.DataException
+            When the symbol is not assigned, the settlement is not assigned or is not valid.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        A dataframe with quotes.
+        """
+
+        if not symbol:
+            raise DataException('Symbol is not assigned')
+
+        symbol = symbol.upper()
+        settlement = self.get_settlement_for_request(settlement, symbol)
+
+        data = await self.__post('/Prices/GetByStock', {'symbol': symbol, 'term': settlement})
+
+        with self._auth.measure('/Prices/GetByStock', 'build_seconds'):
+            if data['Result'] and data['Result']['Stock'] and data['Result']['Stock']['StockDepthBox'] and data['Result']['Stock']['StockDepthBox']['PriceDepthBox']:
+                df_buy = pd.DataFrame(data['Result']['Stock']['StockDepthBox']['PriceDepthBox']['BuySide'])
+                df_sell = pd.DataFrame(data['Result']['Stock']['StockDepthBox']['PriceDepthBox']['SellSide'])
+            else:
+                df_buy = pd.DataFrame()
+                df_sell = pd.DataFrame()
+
+            return self.process_order_book(symbol, settlement, df_buy, df_sell)
+
+    async def get_market_snapshot(self, deadline=None):
+        """
+        Get a snapshot of all the market boards.
+        All the boards are requested concurrently.
+
+        Parameters
+        ----------
+        deadline : float, optional
+            The maximum number of seconds to wait for all the boards.
+            Every board request can use the whole time, they are sent at the same time.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        asyncio.TimeoutError
+            The deadline is exceeded.  The pending board requests are cancelled.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        A dictionary with the board dataframes.
+        The key is the board name.
+        The value is the dataframe with the information
+        """
+
+        snapshot_requests = self.get_market_snapshot_requests()
+
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                self.get_options(),
+                *[self.__get_securities(board_rq, settlement_rq) for _, _, board_rq, settlement_rq in snapshot_requests]),
+            deadline)
+
+        securities = {(board, settlement): df for (board, settlement, _, _), df in zip(snapshot_requests, results[1:])}
+
+        return self.process_market_snapshot(securities, results[0])
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    async def __get_securities(self, board, settlement):
+
+        data = await self.__post('/Prices/GetByPanel', {'panel': board, 'term': settlement or ''})
+
+        with self._auth.measure('/Prices/GetByPanel', 'build_seconds'):
+            df = pd.DataFrame(data['Result']['Stocks']) if data['Result'] and data['Result']['Stocks'] else pd.DataFrame()
+
+            return self.process_securities(df)
+
+    async def __post(self, url, payload=None):
+
+        if not self._auth.is_user_logged_in:
+            raise SessionException('User is not logged in')
+
+        headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+
+        response = await self._auth.post(url, json=payload, headers=headers, idempotent=True)
+
+        with self._auth.measure(url, 'decode_seconds'):
+            response = json_loads(response.content)
+
+        if not response['Success']:
+            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
+
+        return response
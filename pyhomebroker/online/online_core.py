@@ -19,7 +19,7 @@
 # limitations under the License.
 #
 
-from ..common import convert_to_numeric_columns, DataException
+from ..common import convert_to_numeric_columns, compact_dataframe, DataException
 
 from abc import ABCMeta, abstractmethod
 from datetime import datetime
@@ -28,12 +28,28 @@ import pandas as pd
 import numpy as np
 
 class OnlineCore(object, metaclass=ABCMeta):
-    
+
+    # If the dataframes use compact types (float32, int32, categoricals)
+    compact = False
+
     __settlements_int_map = {
         '1': 'spot',
         '2': '24hs',
         '3': '48hs'}
 
+    __settlements_str_map = {
+        'spot': '1',
+        '24hs': '2',
+        '48hs': '3'}
+
+    __boards_map = {
+        'bluechips': 'accionesLideres',
+        'general_board': 'panelGeneral',
+        'cedears': 'cedears',
+        'government_bonds': 'rentaFija',
+        'short_term_government_bonds': 'letes',
+        'corporate_bonds': 'obligaciones'}
+
     __call_put_map = {
         0: '',
         1: 'CALL',
@@ -47,6 +63,14 @@ class OnlineCore(object, metaclass=ABCMeta):
         'letes': 'short_term_government_bonds',
         'obligaciones': 'corporate_bonds'}
 
+    # The maps as an index with the keys and an array with the values, so a column is translated with a single lookup
+    __settlements_lookup = (pd.Index(list(__settlements_int_map)), pd.Series(list(__settlements_int_map.values()) + ['']).array)
+    __call_put_lookup = (pd.Index(list(__call_put_map)), pd.Series(list(__call_put_map.values()) + ['']).array)
+    __group_lookup = (pd.Index(list(__group_map)), pd.Series(list(__group_map.values()) + ['']).array)
+
+    # The type of the parsed dates (the resolution depends on the pandas version)
+    __datetime_type = pd.to_datetime(pd.Series(['19700101']), format='%Y%m%d').dtype
+
     __personal_portfolio_index = ['symbol', 'settlement']
     __personal_portfolio_columns = ['symbol', 'settlement', 'bid_size', 'bid', 'ask', 'ask_size', 'last', 'change', 'open', 'high', 'low', 'previous_close', 'turnover', 'volume', 'operations', 'datetime', 'expiration', 'strike', 'kind', 'underlying_asset', 'close']
     __empty_personal_portfolio = pd.DataFrame(columns=__personal_portfolio_columns).set_index(__personal_portfolio_index)
@@ -69,9 +93,76 @@ class OnlineCore(object, metaclass=ABCMeta):
     __order_book_columns = list(set(__order_book_index) | set(__order_book_buy_columns) | set(__order_book_sell_columns))
     __empty_order_book = pd.DataFrame(columns=__order_book_columns).set_index(__order_book_index)
 
+##########################
+#### REQUEST BUILDERS ####
+##########################
+    def get_board_for_request(self, board):
+
+        if not board.lower() in self.__boards_map:
+            raise DataException('Invalid board name.')
+
+        return self.__boards_map[board.lower()]
+
+    def get_settlement_for_request(self, settlement_str, symbol=None):
+
+        is_option = symbol and len(symbol) == 10
+        if is_option:
+            if settlement_str and settlement_str != '':
+                raise DataException('Invalid settlement for option.  Settlement for options should be None or empty.')
+
+            return settlement_str or ''
+
+        is_repo = symbol and symbol in ['DOLAR', 'PESOS']
+        if is_repo:
+            try:
+                settlement_date = datetime.strptime(settlement_str, '%Y%m%d')
+
+                return settlement_str
+            except ValueError:
+                raise DataException('Invalid settlement for repo.  Settlement for repos should be a string with format %Y%m%d (YYYYMMDD)')
+
+        if not settlement_str or not (settlement_str.lower() in self.__settlements_str_map):
+            raise DataException('Invalid settlement. Settlement for assets should be spot, 24hs or 48hs.')
+
+        return self.__settlements_str_map[settlement_str.lower()]
+
+    def get_market_snapshot_requests(self):
+
+        requests = []
+
+        for board in self.__boards_map:
+            for settlement in self.__settlements_str_map:
+                requests.append((board, settlement, self.get_board_for_request(board), self.get_settlement_for_request(settlement)))
+
+        return requests
+
 ############################
 ## PROCESS JSON DOCUMENTS ##
 ############################
+    def process_market_snapshot(self, securities, options):
+
+        boards = {}
+
+        for board in self.__boards_map:
+
+            data = {}
+            for settlement in self.__settlements_str_map:
+                data[settlement] = securities[(board, settlement)].reset_index()
+
+            boards[board] = pd.concat(data)
+            boards[board]['sort'] = boards[board]['settlement'] != 'spot'
+            boards[board] = boards[board].sort_values(by=['symbol','sort','settlement'])
+            boards[board] = boards[board].set_index(['symbol', 'settlement'])
+            boards[board].drop(['ask','ask_size','bid_size','bid','group','sort'], axis=1, inplace=True)
+
+        boards['options'] = options.drop(['ask','ask_size','bid_size','bid'], axis=1)
+        boards['options'] = boards['options'].sort_values(by=['symbol'])
+
+        if self.compact:
+            boards = {board: compact_dataframe(df) for board, df in boards.items()}
+
+        return boards
+
     def process_personal_portfolio(self, data):
 
         if not data:
@@ -86,12 +177,17 @@ class OnlineCore(object, metaclass=ABCMeta):
         numeric_options_columns = ['MaturityDate', 'StrikePrice']
         alpha_option_columns = ['PutOrCall', 'Issuer']
 
-        df.TradeDate = pd.to_datetime(df.TradeDate, format='%Y%m%d', errors='coerce') + pd.to_timedelta(df.Hour, errors='coerce')
-        df.loc[df.StrikePrice == 0, alpha_option_columns] = ''
-        df.loc[df.StrikePrice == 0, numeric_options_columns] = np.nan
-        df.MaturityDate = pd.to_datetime(df.MaturityDate, format='%Y%m%d', errors='coerce')
-        df.PutOrCall = df.PutOrCall.apply(lambda x: self.__call_put_map[x] if x in self.__call_put_map else self.__call_put_map[0])
-        df.Term = df.Term.apply(lambda x: self.__settlements_int_map[x] if x in self.__settlements_int_map else '')
+        not_options = df.StrikePrice == 0
+
+        df.TradeDate = self.__get_trade_datetime(df.TradeDate, df.Hour)
+        df.PutOrCall = self.__map_values(df.PutOrCall, self.__call_put_lookup)
+
+        # The columns are replaced (not assigned by rows), so the text and NaN values do not change the types in place
+        df[alpha_option_columns] = df[alpha_option_columns].mask(not_options, '')
+        df[numeric_options_columns] = df[numeric_options_columns].mask(not_options)
+
+        df.MaturityDate = pd.Series(self.__get_dates(df.MaturityDate), index=df.index)
+        df.Term = self.__map_values(df.Term, self.__settlements_lookup)
 
         df = df[filter_columns].copy()
         df.columns = self.__personal_portfolio_columns
@@ -99,7 +195,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         df = convert_to_numeric_columns(df, numeric_columns)
         df = df.set_index(self.__personal_portfolio_index)
 
-        return df
+        return self.__compact(df)
 
     def process_securities(self, df):
 
@@ -107,9 +203,9 @@ class OnlineCore(object, metaclass=ABCMeta):
         numeric_columns = ['last', 'close', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_size', 'bid', 'ask_size', 'ask', 'previous_close']
 
         if not df.empty:
-            df.TradeDate = pd.to_datetime(df.TradeDate, format='%Y%m%d', errors='coerce') + pd.to_timedelta(df.Hour, errors='coerce')
-            df.Term = df.Term.apply(lambda x: self.__settlements_int_map[x] if x in self.__settlements_int_map else '')
-            df.Panel = df.Panel.apply(lambda x: self.__group_map[x] if x in self.__group_map else '')
+            df.TradeDate = self.__get_trade_datetime(df.TradeDate, df.Hour)
+            df.Term = self.__map_values(df.Term, self.__settlements_lookup)
+            df.Panel = self.__map_values(df.Panel, self.__group_lookup)
 
             df = df[filter_columns].copy()
             df.columns = self.__securities_columns
@@ -119,7 +215,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         else:
             df = self.__empty_securities.copy()
 
-        return df
+        return self.__compact(df)
 
     def process_options(self, df):
 
@@ -127,9 +223,9 @@ class OnlineCore(object, metaclass=ABCMeta):
         numeric_columns = ['last', 'close', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_size', 'bid', 'ask_size', 'ask', 'previous_close', 'strike']
 
         if not df.empty:
-            df.TradeDate = pd.to_datetime(df.TradeDate, format='%Y%m%d', errors='coerce') + pd.to_timedelta(df.Hour, errors='coerce')
-            df.MaturityDate = pd.to_datetime(df.MaturityDate, format='%Y%m%d', errors='coerce')
-            df.PutOrCall = df.PutOrCall.apply(lambda x: self.__call_put_map[x] if x in self.__call_put_map else self.__call_put_map[0])
+            df.TradeDate = self.__get_trade_datetime(df.TradeDate, df.Hour)
+            df.MaturityDate = pd.Series(self.__get_dates(df.MaturityDate), index=df.index)
+            df.PutOrCall = self.__map_values(df.PutOrCall, self.__call_put_lookup)
 
             df = df[filter_columns].copy()
             df.columns = self.__options_columns
@@ -141,7 +237,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         else:
             df = self.__empty_options.copy()
 
-        return df
+        return self.__compact(df)
 
     def process_repos(self, df):
 
@@ -149,7 +245,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         numeric_columns = ['last', 'open', 'high', 'low', 'volume', 'turnover', 'operations', 'change', 'bid_amount', 'bid_rate', 'ask_rate', 'ask_amount', 'previous_close', 'close']
 
         if not df.empty:
-            df.TradeDate = pd.to_datetime(df.TradeDate, format='%Y%m%d', errors='coerce') + pd.to_timedelta(df.Hour, errors='coerce')
+            df.TradeDate = self.__get_trade_datetime(df.TradeDate, df.Hour)
 
             df = df[filter_columns].copy()
             df.columns = self.__repos_columns
@@ -159,7 +255,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         else:
             df = self.__empty_repos.copy()
 
-        return df
+        return self.__compact(df)
 
     def process_order_book(self, name, settlement, df_buy, df_sell):
 
@@ -182,7 +278,7 @@ class OnlineCore(object, metaclass=ABCMeta):
         df = convert_to_numeric_columns(df, list(set(self.__order_book_buy_columns) | set(self.__order_book_sell_columns)))
         df = df.set_index(self.__order_book_index)
 
-        return df
+        return self.__compact(df)
 
     def process_order_books(self, data):
 
@@ -203,4 +299,54 @@ class OnlineCore(object, metaclass=ABCMeta):
             order_book = self.process_order_book(item['Symbol'], item['Term'], df_buy, df_sell)
             df = order_book if df.empty else pd.concat([df, order_book])
 
-        return df
+        # The categories of every order book are different, so the concatenated dataframe is converted again
+        return self.__compact(df)
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __compact(self, df):
+
+        return compact_dataframe(df) if self.compact else df
+
+    def __map_values(self, series, lookup):
+
+        keys, values = lookup
+
+        # The unknown keys get the position -1, so they take the last value of the lookup (an empty string)
+        return pd.Series(values.take(keys.get_indexer(series)), index=series.index)
+
+    def __get_dates(self, dates):
+
+        # A batch has few distinct dates, so each one is parsed once and the rows take the parsed value
+        codes, uniques = pd.factorize(np.asarray(dates, dtype=object))
+
+        try:
+            # Numpy parses the ISO dates without the overhead of the pandas format parser
+            parsed = np.array(['{}-{}-{}'.format(x[:4], x[4:6], x[6:]) if len(x) == 8 and x.isdigit() else '' for x in uniques], dtype='datetime64[D]')
+            parsed = parsed.astype(self.__datetime_type)
+        except (TypeError, ValueError):
+            parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y%m%d', errors='coerce').to_numpy()
+
+        # The missing values get the position -1, so they take the last value (NaT)
+        return np.append(parsed, np.datetime64('NaT'))[codes]
+
+    def __get_times(self, hours):
+
+        codes, uniques = pd.factorize(np.asarray(hours, dtype=object))
+
+        # The hours have the format HH:MM:SS, so the digits are read from the character codes (the 9th character must be empty)
+        chars = np.asarray(uniques, dtype='U9').view(np.uint32).reshape(-1, 9).astype(np.int64) - ord('0')
+        digits = chars[:, [0, 1, 3, 4, 6, 7]]
+
+        if ((digits >= 0) & (digits <= 9)).all() and (chars[:, [2, 5]] == ord(':') - ord('0')).all() and (chars[:, 8] == -ord('0')).all():
+            parsed = (digits[:, [0, 2, 4]] * 10 + digits[:, [1, 3, 5]]) @ np.array([3600, 60, 1])
+            parsed = parsed.astype('timedelta64[s]')
+        else:
+            parsed = pd.to_timedelta(pd.Series(uniques, dtype=object), errors='coerce').to_numpy()
+
+        return np.append(parsed, np.timedelta64('NaT'))[codes]
+
+    def __get_trade_datetime(self, dates, hours):
+
+        return pd.Series(self.__get_dates(dates) + self.__get_times(hours), index=dates.index)
@@ -19,4 +19,6 @@
 # limitations under the License.
 #
 
+from .orders_core import OrdersCore
 from .orders import Orders
+from .orders_async import AsyncOrders
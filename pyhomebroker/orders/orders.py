@@ -19,39 +19,12 @@
 # limitations under the License.
 #
 
-from ..common import user_agent, SessionException, ServerException, DataException
+from ..common import user_agent, json_loads, create_deadline, PRIORITY_ORDERS, PRIORITY_ORDERS_STATUS, SessionException, DataException
+from .orders_core import OrdersCore
 
-from datetime import datetime, timedelta
 from threading import Lock
 
-import requests as rq
-import pandas as pd
-import numpy as np
-
-class Orders:
-
-    __settlements_orders_map = {
-        'Contado': 'spot',
-        '24 Hs.': '24hs',
-        '48 Hs.': '48hs'}
-
-    __settlements_int_map = {
-        'spot': '1',
-        '24hs': '2',
-        '48hs': '3'}
-
-    __order_status_map = {
-        'Anulada': 'CANCELLED',
-        'Pendiente': 'PENDING',
-        'Recibida': 'OFFERED',
-        'Cumplida': 'COMPLETED',
-        'Parcial': 'PARTIAL',
-        'Rechazada': 'REJECTED' # PENDING CHECK
-    }
-
-    __orders_status_index = ['order_number']
-    __orders_status_columns = ['order_number', 'symbol', 'settlement', 'operation_type', 'size', 'price', 'remaining_size', 'datetime', 'status', 'cancellable', 'total']
-    __empty_orders_status = pd.DataFrame(columns=__orders_status_columns).set_index(__orders_status_index)
+class Orders(OrdersCore):
 
     __orders_send_lock = Lock()
 
@@ -79,7 +52,7 @@ class Orders:
 ########################
 #### PUBLIC METHODS ####
 ########################
-    def get_orders_status(self, account_id):
+    def get_orders_status(self, account_id, deadline=None):
         """
         Get the orders status.
 
@@ -87,6 +60,8 @@ class Orders:
         ----------
         account_id : str
             The account identification used to retrieve the orders status.
+        deadline : float, optional
+            The maximum number of seconds to wait for the response.
 
         Raises
         ------
@@ -94,6 +69,8 @@ class Orders:
             If the user is not logged in.
         pyhomebroker.exceptions.ServerException
             When the server returns an error in the response.
+        requests.exceptions.Timeout
+            The server did not answer in time or the deadline is exceeded.
         requests.exceptions.HTTPError
             There is a problem related to the HTTP request.
 
@@ -102,12 +79,12 @@ class Orders:
         A dataframe with orders status.
         """
 
-        data = self.__get_orders_status(account_id)
-        orders = self.__filter_orders_from_json(data)
+        orders = self.__get_orders_status(account_id, create_deadline(deadline))
 
-        return self.__process_orders(orders)
+        with self.__auth.measure('/Consultas/GetConsulta', 'build_seconds'):
+            return self.process_orders(orders)
 
-    def send_buy_order(self, symbol, settlement, price, size, market = 1, order_type = 2):
+    def send_buy_order(self, symbol, settlement, price, size, market = 1, order_type = 2, deadline=None):
         """
         Send a buy order to the market.
 
@@ -134,15 +111,21 @@ class Orders:
             Valid values:
                 1: Market
                 2: Limit (default)
+        deadline : float, optional
+            The maximum number of seconds to wait for the order to be sent.
+            If the deadline is reached after the order was validated, check get_orders_status to know if it was accepted.
 
         Raises
         ------
         pyhomebroker.exceptions.SessionException
-            If the user is not logged in.
+            If the user is not logged in or the session expired during the operation.
+            The session is renewed (if relogin is enabled) but the operation is not sent again, check get_orders_status.
         pyhomebroker.exceptions.ServerException
             When the server returns an error in the response.
         pyhomebroker.exceptions.DataException
             When one of the parameters is invalid.
+        requests.exceptions.Timeout
+            The server did not answer in time or the deadline is exceeded.
         requests.exceptions.HTTPError
             There is a problem related to the HTTP request.
 
@@ -154,12 +137,14 @@ class Orders:
         if size <= 0:
             raise DataException('Size is not valid')
 
+        deadline = create_deadline(deadline, 2)
+
         with self.__orders_send_lock:
 
-            self.__send_order_validation(symbol, settlement, price, size, market, order_type)
-            return self.__send_order_confirmation()
+            self.__send_order_validation(symbol, settlement, price, size, market, order_type, deadline)
+            return self.__send_order_confirmation(deadline)
 
-    def send_sell_order(self, symbol, settlement, price, size, market = 1, order_type = 2):
+    def send_sell_order(self, symbol, settlement, price, size, market = 1, order_type = 2, deadline=None):
         """
         Send a sell order to the market.
 
@@ -186,15 +171,21 @@ class Orders:
             Valid values:
                 1: Market
                 2: Limit (default)
+        deadline : float, optional
+            The maximum number of seconds to wait for the order to be sent.
+            If the deadline is reached after the order was validated, check get_orders_status to know if it was accepted.
 
         Raises
         ------
         pyhomebroker.exceptions.SessionException
-            If the user is not logged in.
+            If the user is not logged in or the session expired during the operation.
+            The session is renewed (if relogin is enabled) but the operation is not sent again, check get_orders_status.
         pyhomebroker.exceptions.ServerException
             When the server returns an error in the response.
         pyhomebroker.exceptions.DataException
             When one of the parameters is invalid.
+        requests.exceptions.Timeout
+            The server did not answer in time or the deadline is exceeded.
         requests.exceptions.HTTPError
             There is a problem related to the HTTP request.
 
@@ -206,12 +197,14 @@ class Orders:
         if size <= 0:
             raise DataException('Size is not valid')
 
+        deadline = create_deadline(deadline, 2)
+
         with self.__orders_send_lock:
 
-            self.__send_order_validation(symbol, settlement, price, -size, market, order_type)
-            return self.__send_order_confirmation()
+            self.__send_order_validation(symbol, settlement, price, -size, market, order_type, deadline)
+            return self.__send_order_confirmation(deadline)
 
-    def cancel_order(self, account_id, order_number):
+    def cancel_order(self, account_id, order_number, deadline=None):
         """
         Cancel an order by number.
 
@@ -221,21 +214,26 @@ class Orders:
             The account identification used to retrieve the orders status.
         order_number : numeric
             The order number.
+        deadline : float, optional
+            The maximum number of seconds to wait for the response.
 
         Raises
         ------
         pyhomebroker.exceptions.SessionException
-            If the user is not logged in.
+            If the user is not logged in or the session expired during the operation.
+            The session is renewed (if relogin is enabled) but the operation is not sent again, check get_orders_status.
         pyhomebroker.exceptions.ServerException
             When the server returns an error in the response.
         pyhomebroker.exceptions.DataException
             When one of the parameters is invalid.
+        requests.exceptions.Timeout
+            The server did not answer in time or the deadline is exceeded.
         requests.exceptions.HTTPError
             There is a problem related to the HTTP request.
         """
 
-        data = self.__get_orders_status(account_id)
-        orders = self.__filter_orders_from_json(data)
+        deadline = create_deadline(deadline, 3)
+        orders = self.__get_orders_status(account_id, deadline)
 
         for order in orders:
 
@@ -246,14 +244,14 @@ class Orders:
 
                 with self.__orders_send_lock:
 
-                    self.__send_cancel_validation(order['CESP'], order['TICK'], order['CANT'], order['PCIO'], order['IMPO'], order['FVTO'], order['TIPO'], order['PLAZ'], order['NUME'])
-                    self.__send_cancel_confirmation()
+                    self.__send_cancel_validation(order, deadline)
+                    self.__send_cancel_confirmation(deadline)
 
                 return
 
         raise DataException("Order {} not found".format(order_number))
 
-    def cancel_all_orders(self, account_id):
+    def cancel_all_orders(self, account_id, deadline=None):
         """
         Cancel all the cancellable orders.
 
@@ -261,21 +259,29 @@ class Orders:
         ----------
         account_id : str
             The account identification used to retrieve the orders status.
+        deadline : float, optional
+            The maximum number of seconds to wait for the response.
 
         Raises
         ------
         pyhomebroker.exceptions.SessionException
-            If the user is not logged in.
+            If the user is not logged in or the session expired during the operation.
+            The session is renewed (if relogin is enabled) but the operation is not sent again, check get_orders_status.
         pyhomebroker.exceptions.ServerException
             When the server returns an error in the response.
         pyhomebroker.exceptions.DataException
             When one of the parameters is invalid.
+        requests.exceptions.Timeout
+            The server did not answer in time or the deadline is exceeded.
         requests.exceptions.HTTPError
             There is a problem related to the HTTP request.
         """
 
-        data = self.__get_orders_status(account_id)
-        orders = self.__filter_orders_from_json(data)
+        deadline = create_deadline(deadline, 3)
+        orders = self.__get_orders_status(account_id, deadline)
+
+        if deadline:
+            deadline.set_requests(2 * len([order for order in orders if order['CanCancel']]))
 
         for order in orders:
 
@@ -284,13 +290,13 @@ class Orders:
 
             with self.__orders_send_lock:
 
-                self.__send_cancel_validation(order['CESP'], order['TICK'], order['CANT'], order['PCIO'], order['IMPO'], order['FVTO'], order['TIPO'], order['PLAZ'], order['NUME'])
-                self.__send_cancel_confirmation()
+                self.__send_cancel_validation(order, deadline)
+                self.__send_cancel_confirmation(deadline)
 
 #########################
 #### PRIVATE METHODS ####
 #########################
-    def __get_orders_status(self, account_id):
+    def __get_orders_status(self, account_id, deadline=None):
 
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
@@ -301,103 +307,23 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Consultas/GetConsulta'.format(self.__auth.broker['page'])
-
-        payload = {
-            'comitente': str(account_id),
-            'consolida': '0',
-            'proceso': '121',
-            'tipo': None
-        }
-
-        response = rq.post(url, json=payload, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
-
-        response = response.json()
-
-        if not response['Success']:
-            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
-
-        if not response['Result']:
-            return [] # Response without result means that there are not orders in the list.
-
-        return response['Result']
-
-    def __filter_orders_from_json(self, data):
-
-        result = []
-
-        for item in data:
-
-            if 'listaDetalleTiker' in item and item['listaDetalleTiker']:
-                for detail in item['listaDetalleTiker']:
+        url = '/Consultas/GetConsulta'
 
-                    result = result + detail['ORDE']
+        payload = self.get_orders_status_payload(account_id)
 
-        return result
+        response = self.__auth.post(url, json=payload, headers=headers, deadline=deadline, idempotent=True, priority=PRIORITY_ORDERS_STATUS)
 
-    def __process_orders(self, orders):
+        with self.__auth.measure(url, 'decode_seconds'):
+            response = json_loads(response.content)
 
-        if not orders:
-            return self.__empty_orders_status
+        return self.filter_orders_from_json(response)
 
-        filter_columns = ['NUME', 'TICK', 'PLAZ', 'TIPO', 'CANT', 'PCIO', 'REMN', 'FALT', 'ESTA', 'CanCancel', 'TOTAL']
-        numeric_columns = ['order_number', 'size', 'price', 'remaining_size', 'total']
+    def __send_order_validation(self, symbol, settlement, price, size, market, order_type, deadline=None):
 
-        df = pd.DataFrame()
-
-        for order in orders:
-
-            df_order = pd.DataFrame([order])
-            df_order['REMN'] = pd.to_numeric(df_order.CANT)
-            df_order['TOTAL'] = pd.to_numeric(df_order.IMPO)
-            if order['APLI']:
-                df_operations = pd.DataFrame(order['APLI'])
-                df_operations.CANT = pd.to_numeric(df_operations.CANT)
-                df_operations.IMPO = pd.to_numeric(df_operations.IMPO)
-                df_order.REMN = df_order.REMN - df_operations.CANT.sum()
-                df_order.TOTAL = df_operations.IMPO.sum()
-
-            df = df_order if df.empty else pd.concat([df, df_order])
-
-        if not df.empty:
-            df.FALT = pd.to_datetime(df.FALT, format='%d/%m/%y', errors='coerce') + pd.to_timedelta(df.HORA, errors='coerce')
-            df.loc[(df.TICK.str.len() == 10), 'PLAZ'] = ''
-            df.PLAZ = df.PLAZ.apply(lambda x: self.__settlements_orders_map[x] if x in self.__settlements_orders_map else x)
-            df.TIPO = df.TIPO.apply(lambda x: 'BUY' if x == 'CPRA' else 'SELL')
-            df.ESTA = df.ESTA.apply(lambda x: self.__order_status_map[x] if x in self.__order_status_map else x)
-
-            df = df[filter_columns].copy()
-            df.columns = self.__orders_status_columns
-
-            for col in numeric_columns:
-                df[col] = pd.to_numeric(df[col].apply(lambda x: np.nan if x == '-' else x))
-
-            df = df.set_index(self.__orders_status_index).sort_index()
-        else:
-            df = self.__empty_orders_status
-
-        return df
-
-    def __send_order_validation(self, symbol, settlement, price, size, market, order_type):
-        
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
 
-        if price <= 0:
-            raise DataException('Price is not valid')
-
-        if size != int(size):
-            raise DataException('Size is not valid')
-
-        if len(symbol) == 10: # Options
-            settlement = '24hs'
-
-        symbol = str.upper(symbol)
-        settlement = str.lower(settlement)
-
-        if not (settlement in self.__settlements_int_map):
-            raise DataException('settlement is not valid')
+        payload = self.get_order_validation_payload(symbol, settlement, price, size, market, order_type)
 
         headers = {
             'User-Agent': user_agent,
@@ -405,35 +331,13 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Order/ValidarCargaOrdenAsync'.format(self.__auth.broker['page'])
-
-        curr_time = datetime.utcnow() + timedelta(hours=-3)
-        date_valid = curr_time if curr_time.hour <= 17 else curr_time + timedelta(days=1)
-
-        payload = {
-            'NombreEspecie': symbol,
-            'Cantidad': str(abs(size)),
-            'Precio': str(price).replace('.',','),
-            'Importe': '',
-            'DateValid': date_valid.strftime('%d/%m/%Y'),
-            'OptionTipo': 1 if size > 0 else 2,
-            'OptionTipoPlazo': self.__settlements_int_map[settlement],
-            'market': market,
-            'orderType': order_type
-        }
-
-        response = rq.post(url, json=payload, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
+        url = '/Order/ValidarCargaOrdenAsync'
 
-        response = response.json()
+        response = self.__auth.post(url, json=payload, headers=headers, deadline=deadline, priority=PRIORITY_ORDERS)
 
-        if not response['Success']:
-            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
+        self.check_order_validation(json_loads(response.content))
 
-        if not response['Result']['ResponseOrden']['Verified']:
-            raise ServerException(response['Result']['ResponseOrden']['ErrorMessage'] or 'Order not verified by server')
-
-    def __send_order_confirmation(self):
+    def __send_order_confirmation(self, deadline=None):
 
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
@@ -444,27 +348,18 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Order/EnviarOrdenConfirmadaAsyc'.format(self.__auth.broker['page'])
-
-        response = rq.post(url, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
-
-        response = response.json()
+        url = '/Order/EnviarOrdenConfirmadaAsyc'
 
-        if not response['Success']:
-            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
+        response = self.__auth.post(url, headers=headers, deadline=deadline, priority=PRIORITY_ORDERS)
 
-        if not response['Result']['ResponseOrden']['Accepted'] and \
-            'HasReconfirmacion' in response['Result']['ResponseOrden'] and \
-            response['Result']['ResponseOrden']['HasReconfirmacion']:
-            response = self.__send_order_reconfirmation()
+        response = json_loads(response.content)
 
-        if not response['Result']['ResponseOrden']['Accepted']:
-            raise ServerException('Order not accepted by server.  Error: {}'.format(response['Result']['ResponseOrden']['ErrorMessage'] or 'Unknown Error'))
+        if self.is_order_reconfirmation_required(response):
+            response = self.__send_order_reconfirmation(deadline)
 
-        return response['Result']['ResponseOrden']['Orden']['NroOrden']
+        return self.get_order_number(response)
 
-    def __send_order_reconfirmation(self):
+    def __send_order_reconfirmation(self, deadline=None):
 
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
@@ -475,14 +370,13 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Order/EnviarOrdenReconfirmada'.format(self.__auth.broker['page'])
+        url = '/Order/EnviarOrdenReconfirmada'
 
-        response = rq.post(url, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
+        response = self.__auth.post(url, headers=headers, deadline=deadline, priority=PRIORITY_ORDERS)
 
-        return response.json()
+        return json_loads(response.content)
 
-    def __send_cancel_validation(self, symbol_id, symbol, size, price, amount, date_valid, operation, settlement, order_number):
+    def __send_cancel_validation(self, order, deadline=None):
 
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
@@ -493,29 +387,15 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Order/EnviarCancelacionAsyc'.format(self.__auth.broker['page'])
-
-        payload = {
-            'especie': str(symbol_id),
-            'Ticker': symbol,
-            'Cantidad': '{:.2f}'.format(float(size)).replace('.',','),
-            'Precio': '{:.2f}'.format(float(price)).replace('.',','),
-            'Importe': '{:.2f}'.format(float(amount)).replace('.',','),
-            'DateValid': date_valid,
-            'OptionTipo': operation,
-            'OptionTipoPlazo': settlement,
-            'Numero': order_number,
-        }
+        url = '/Order/EnviarCancelacionAsyc'
 
-        response = rq.post(url, json=payload, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
+        payload = self.get_cancel_validation_payload(order)
 
-        response = response.json()
+        response = self.__auth.post(url, json=payload, headers=headers, deadline=deadline, priority=PRIORITY_ORDERS)
 
-        if not response['Success']:
-            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
+        self.check_response(json_loads(response.content))
 
-    def __send_cancel_confirmation(self):
+    def __send_cancel_confirmation(self, deadline=None):
 
         if not self.__auth.is_user_logged_in:
             raise SessionException('User is not logged in')
@@ -526,12 +406,8 @@ class Orders:
             'Content-Type': 'application/json; charset=UTF-8'
         }
 
-        url = '{}/Order/EnviarOrdenCanceladaAsyc'.format(self.__auth.broker['page'])
-
-        response = rq.post(url, headers=headers, cookies=self.__auth.cookies, proxies=self.__proxies)
-        response.raise_for_status()
+        url = '/Order/EnviarOrdenCanceladaAsyc'
 
-        response = response.json()
+        response = self.__auth.post(url, headers=headers, deadline=deadline, priority=PRIORITY_ORDERS)
 
-        if not response['Success']:
-            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
\ No newline at end of file
+        self.check_response(json_loads(response.content))
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import user_agent, json_loads, PRIORITY_ORDERS, PRIORITY_ORDERS_STATUS, SessionException, DataException
+from .orders_core import OrdersCore
+
+import asyncio
+
+class AsyncOrders(OrdersCore):
+
+    def __init__(self, auth):
+        """
+        Class constructor.
+
+        Parameters
+        ----------
+        auth : async_home_broker_session
+            An object with the authentication information.
+        """
+
+        self.__auth = auth
+        self.__orders_send_lock = asyncio.Lock()
+
+########################
+#### PUBLIC METHODS ####
+########################
+    async def get_orders_status(self, account_id):
+        """
+        Get the orders status.
+
+        Parameters
+        ----------
+        account_id : str
+            The account identification used to retrieve the orders status.
+
+        Raises
+        ------
+        pyhomebroker.exceptions.SessionException
+            If the user is not logged in.
+        pyhomebroker.exceptions.ServerException
+            When the server returns an error in the response.
+        httpx.HTTPError
+            There is a problem related to the HTTP request.
+
+        Returns
+        -------
+        A dataframe with orders status.
+        """
+
+        orders = await self.__get_orders_status(account_id)
+
+        with self.__auth.measure('/Consultas/GetConsulta', 'build_seconds'):
+            return self.process_orders(orders)
+
+    async def send_buy_order(self, symbol, settlement, price, size, market = 1, order_type = 2):
+        """
+        Send a buy order to the market. (Check Orders.send_buy_order)
+
+        Returns
+        -------
+        The order number.
+        """
+
+        if size <= 0:
+            raise DataException('Size is not valid')
+
+        async with self.__orders_send_lock:
+
+            await self.__send_order_validation(symbol, settlement, price, size, market, order_type)
+            return await self.__send_order_confirmation()
+
+    async def send_sell_order(self, symbol, settlement, price, size, market = 1, order_type = 2):
+        """
+        Send a sell order to the market. (Check Orders.send_sell_order)
+
+        Returns
+        -------
+        The order number.
+        """
+
+        if size <= 0:
+            raise DataException('Size is not valid')
+
+        async with self.__orders_send_lock:
+
+            await self.__send_order_validation(symbol, settlement, price, -size, market, order_type)
+            return await self.__send_order_confirmation()
+
+    async def cancel_order(self, account_id, order_number):
+        """
+        Cancel an order by number. (Check Orders.cancel_order)
+        """
+
+        orders = await self.__get_orders_status(account_id)
+
+        for order in orders:
+
+            if order['NUME'] == str(order_number):
+
+                if not order['CanCancel']:
+                    raise DataException("Order {} is not cancellable".format(order_number))
+
+                async with self.__orders_send_lock:
+
+                    await self.__send_cancel_validation(order)
+                    await self.__send_cancel_confirmation()
+
+                return
+
+        raise DataException("Order {} not found".format(order_number))
+
+    async def cancel_all_orders(self, account_id):
+        """
+        Cancel all the cancellable orders. (Check Orders.cancel_all_orders)
+        """
+
+        orders = await self.__get_orders_status(account_id)
+
+        for order in orders:
+
+            if not order['CanCancel']:
+                continue
+
+            async with self.__orders_send_lock:
+
+                await self.__send_cancel_validation(order)
+                await self.__send_cancel_confirmation()
+
+#########################
+#### PRIVATE METHODS ####
+#########################
+    def __get_headers(self):
+
+        if not self.__auth.is_user_logged_in:
+            raise SessionException('User is not logged in')
+
+        return {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Content-Type': 'application/json; charset=UTF-8'
+        }
+
+    async def __get_orders_status(self, account_id):
+
+        headers = self.__get_headers()
+        payload = self.get_orders_status_payload(account_id)
+
+        response = await self.__auth.post('/Consultas/GetConsulta', json=payload, headers=headers, idempotent=True, priority=PRIORITY_ORDERS_STATUS)
+
+        with self.__auth.measure('/Consultas/GetConsulta', 'decode_seconds'):
+            response = json_loads(response.content)
+
+        return self.filter_orders_from_json(response)
+
+    async def __send_order_validation(self, symbol, settlement, price, size, market, order_type):
+
+        headers = self.__get_headers()
+        payload = self.get_order_validation_payload(symbol, settlement, price, size, market, order_type)
+
+        response = await self.__auth.post('/Order/ValidarCargaOrdenAsync', json=payload, headers=headers, priority=PRIORITY_ORDERS)
+
+        self.check_order_validation(json_loads(response.content))
+
+    async def __send_order_confirmation(self):
+
+        headers = self.__get_headers()
+
+        response = await self.__auth.post('/Order/EnviarOrdenConfirmadaAsyc', headers=headers, priority=PRIORITY_ORDERS)
+        response = json_loads(response.content)
+
+        if self.is_order_reconfirmation_required(response):
+            response = await self.__auth.post('/Order/EnviarOrdenReconfirmada', headers=self.__get_headers(), priority=PRIORITY_ORDERS)
+            response = json_loads(response.content)
+
+        return self.get_order_number(response)
+
+    async def __send_cancel_validation(self, order):
+
+        headers = self.__get_headers()
+        payload = self.get_cancel_validation_payload(order)
+
+        response = await self.__auth.post('/Order/EnviarCancelacionAsyc', json=payload, headers=headers, priority=PRIORITY_ORDERS)
+
+        self.check_response(json_loads(response.content))
+
+    async def __send_cancel_confirmation(self):
+
+        headers = self.__get_headers()
+
+        response = await self.__auth.post('/Order/EnviarOrdenCanceladaAsyc', headers=headers, priority=PRIORITY_ORDERS)
+
+        self.check_response(json_loads(response.content))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from ..common import ServerException, DataException
+
+from abc import ABCMeta
+from datetime import datetime, timedelta
+
+import pandas as pd
+import numpy as np
+
+class OrdersCore(object, metaclass=ABCMeta):
+
+    __settlements_orders_map = {
+        'Contado': 'spot',
+        '24 Hs.': '24hs',
+        '48 Hs.': '48hs'}
+
+    __settlements_int_map = {
+        'spot': '1',
+        '24hs': '2',
+        '48hs': '3'}
+
+    __order_status_map = {
+        'Anulada': 'CANCELLED',
+        'Pendiente': 'PENDING',
+        'Recibida': 'OFFERED',
+        'Cumplida': 'COMPLETED',
+        'Parcial': 'PARTIAL',
+        'Rechazada': 'REJECTED' # PENDING CHECK
+    }
+
+    __orders_status_index = ['order_number']
+    __orders_status_columns = ['order_number', 'symbol', 'settlement', 'operation_type', 'size', 'price', 'remaining_size', 'datetime', 'status', 'cancellable', 'total']
+    __empty_orders_status = pd.DataFrame(columns=__orders_status_columns).set_index(__orders_status_index)
+
+##########################
+#### REQUEST BUILDERS ####
+##########################
+    def get_orders_status_payload(self, account_id):
+
+        return {
+            'comitente': str(account_id),
+            'consolida': '0',
+            'proceso': '121',
+            'tipo': None
+        }
+
+    def get_order_validation_payload(self, symbol, settlement, price, size, market, order_type):
+
+        if price <= 0:
+            raise DataException('Price is not valid')
+
+        if size != int(size):
+            raise DataException('Size is not valid')
+
+        if len(symbol) == 10: # Options
+            settlement = '24hs'
+
+        symbol = str.upper(symbol)
+        settlement = str.lower(settlement)
+
+        if not (settlement in self.__settlements_int_map):
+            raise DataException('settlement is not valid')
+
+        curr_time = datetime.utcnow() + timedelta(hours=-3)
+        date_valid = curr_time if curr_time.hour <= 17 else curr_time + timedelta(days=1)
+
+        return {
+            'NombreEspecie': symbol,
+            'Cantidad': str(abs(size)),
+            'Precio': str(price).replace('.',','),
+            'Importe': '',
+            'DateValid': date_valid.strftime('%d/%m/%Y'),
+            'OptionTipo': 1 if size > 0 else 2,
+            'OptionTipoPlazo': self.__settlements_int_map[settlement],
+            'market': market,
+            'orderType': order_type
+        }
+
+    def get_cancel_validation_payload(self, order):
+
+        return {
+            'especie': str(order['CESP']),
+            'Ticker': order['TICK'],
+            'Cantidad': '{:.2f}'.format(float(order['CANT'])).replace('.',','),
+            'Precio': '{:.2f}'.format(float(order['PCIO'])).replace('.',','),
+            'Importe': '{:.2f}'.format(float(order['IMPO'])).replace('.',','),
+            'DateValid': order['FVTO'],
+            'OptionTipo': order['TIPO'],
+            'OptionTipoPlazo': order['PLAZ'],
+            'Numero': order['NUME'],
+        }
+
+############################
+## PROCESS JSON DOCUMENTS ##
+############################
+    def check_response(self, response):
+
+        if not response['Success']:
+            raise ServerException(response['Error']['Descripcion'] or 'Unknown Error')
+
+        return response
+
+    def check_order_validation(self, response):
+
+        self.check_response(response)
+
+        if not response['Result']['ResponseOrden']['Verified']:
+            raise ServerException(response['Result']['ResponseOrden']['ErrorMessage'] or 'Order not verified by server')
+
+    def is_order_reconfirmation_required(self, response):
+
+        self.check_response(response)
+
+        return not response['Result']['ResponseOrden']['Accepted'] and \
+            'HasReconfirmacion' in response['Result']['ResponseOrden'] and \
+            response['Result']['ResponseOrden']['HasReconfirmacion']
+
+    def get_order_number(self, response):
+
+        if not response['Result']['ResponseOrden']['Accepted']:
+            raise ServerException('Order not accepted by server.  Error: {}'.format(response['Result']['ResponseOrden']['ErrorMessage'] or 'Unknown Error'))
+
+        return response['Result']['ResponseOrden']['Orden']['NroOrden']
+
+    def filter_orders_from_json(self, response):
+
+        self.check_response(response)
+
+        if not response['Result']:
+            return [] # Response without result means that there are not orders in the list.
+
+        result = []
+
+        for item in response['Result']:
+
+            if 'listaDetalleTiker' in item and item['listaDetalleTiker']:
+                for detail in item['listaDetalleTiker']:
+
+                    result = result + detail['ORDE']
+
+        return result
+
+    def process_orders(self, orders):
+
+        if not orders:
+            return self.__empty_orders_status
+
+        filter_columns = ['NUME', 'TICK', 'PLAZ', 'TIPO', 'CANT', 'PCIO', 'REMN', 'FALT', 'ESTA', 'CanCancel', 'TOTAL']
+        numeric_columns = ['order_number', 'size', 'price', 'remaining_size', 'total']
+
+        df = pd.DataFrame()
+
+        for order in orders:
+
+            df_order = pd.DataFrame([order])
+            df_order['REMN'] = pd.to_numeric(df_order.CANT)
+            df_order['TOTAL'] = pd.to_numeric(df_order.IMPO)
+            if order['APLI']:
+                df_operations = pd.DataFrame(order['APLI'])
+                df_operations.CANT = pd.to_numeric(df_operations.CANT)
+                df_operations.IMPO = pd.to_numeric(df_operations.IMPO)
+                df_order.REMN = df_order.REMN - df_operations.CANT.sum()
+                df_order.TOTAL = df_operations.IMPO.sum()
+
+            df = df_order if df.empty else pd.concat([df, df_order])
+
+        if not df.empty:
+            df.FALT = pd.to_datetime(df.FALT, format='%d/%m/%y', errors='coerce') + pd.to_timedelta(df.HORA, errors='coerce')
+            df.loc[(df.TICK.str.len() == 10), 'PLAZ'] = ''
+            df.PLAZ = df.PLAZ.apply(lambda x: self.__settlements_orders_map[x] if x in self.__settlements_orders_map else x)
+            df.TIPO = df.TIPO.apply(lambda x: 'BUY' if x == 'CPRA' else 'SELL')
+            df.ESTA = df.ESTA.apply(lambda x: self.__order_status_map[x] if x in self.__order_status_map else x)
+
+            df = df[filter_columns].copy()
+            df.columns = self.__orders_status_columns
+
+            for col in numeric_columns:
+                df[col] = pd.to_numeric(df[col].apply(lambda x: np.nan if x == '-' else x))
+
+            df = df.set_index(self.__orders_status_index).sort_index()
+        else:
+            df = self.__empty_orders_status
+
+        return df
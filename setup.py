@@ -51,12 +51,20 @@ setup(
         'Topic :: Software Development :: Libraries :: Python Modules',
 
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
     ],
     platforms=['any'],
+    python_requires='>=3.7',
     keywords='pandas, homebroker, online, historical, downloader, finance',
     packages=find_packages(exclude=['contrib', 'docs', 'tests', 'examples']),
-    install_requires=['pandas>=1.0.0', 'numpy>=1.18.1', 'requests>=2.21.0', 'signalr-client-threads>=0.0.12', 'pyquery>=1.2']
+    install_requires=['pandas>=1.0.0', 'numpy>=1.18.1', 'requests>=2.21.0', 'signalr-client-threads>=0.0.12,<0.1', 'pyquery>=1.2'],
+    extras_require={
+        'async': ['httpx>=0.26.0'],
+        'http2': ['httpx[http2]>=0.26.0'],
+        'fast': ['orjson>=3.0']
+    },
+    entry_points={
+        'console_scripts': ['pyhomebroker-eod=pyhomebroker.eod_download:main']
+    }
 )
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker.common import compact_dataframe, convert_to_numeric_columns
+
+import numpy as np
+import pandas as pd
+
+import pytest
+
+def create_board(last, bid_size):
+
+    return pd.DataFrame({
+        'symbol': ['GGAL', 'GGAL'],
+        'settlement': ['spot', '24hs'],
+        'last': last,
+        'change': [0.5, -1.25],
+        'bid_size': bid_size,
+        'volume': [100, 200],
+        'unknown': [1.5, 2.5]}).set_index(['symbol', 'settlement'])
+
+def test_compact_types_do_not_depend_on_the_values():
+
+    small = compact_dataframe(create_board([1.5, 2.5], [10, 20]))
+    large = compact_dataframe(create_board([123456.78, np.nan], [10, np.nan]))
+
+    assert dict(small.dtypes) == dict(large.dtypes)
+    assert [level.dtype for level in small.index.levels] == [level.dtype for level in large.index.levels]
+
+    assert small['last'].dtype == np.float64
+    assert small['change'].dtype == np.float32
+    assert small['bid_size'].dtype == np.int32
+    assert small['volume'].dtype == np.int64
+    assert isinstance(small.index.levels[0].dtype, pd.CategoricalDtype)
+
+    # The prices keep the cents and the missing sizes are 0
+    assert large['last'].iloc[0] == 123456.78
+    assert large['bid_size'].tolist() == [10, 0]
+
+def test_compact_types_of_unknown_columns_depend_on_the_values():
+
+    df = pd.DataFrame({'unknown': [1.5, 2.5], 'precise': [123456.1234, 2.0], 'count': [1, 2 ** 40]})
+
+    compact = compact_dataframe(df)
+
+    assert compact['unknown'].dtype == np.float32
+    assert compact['precise'].dtype == np.float64
+    assert compact['count'].dtype == np.int64
+
+def convert_to_numeric_value_by_value(df, columns):
+
+    # The per-value conversion replaced by convert_to_numeric_columns
+    for col in columns:
+        df[col] = df[col].apply(lambda x: x.replace('.', '').replace(',','.') if isinstance(x, str) else x)
+        df[col] = pd.to_numeric(df[col].apply(lambda x: np.nan if x == '-' else x))
+
+    return df
+
+@pytest.mark.parametrize('values', [
+    ['1,5', '-', '-', '2'],
+    ['-', '-'],
+    ['1', None, '2'],
+    ['1,25', np.nan, '-'],
+    [''],
+    ['1', '', '3'],
+    [' 12', '7 '],
+    ['1.234.567', '2'],
+    ['1.234.567,89', '0,01'],
+    ['99999999999999999999', '1'],
+    ['-99999999999999999999'],
+    [1.5, '2,5', '-'],
+    [1, '1.000', None],
+    ['abc', '1']])
+def test_convert_to_numeric_columns_keeps_the_value_by_value_result(values):
+
+    df = pd.DataFrame({'value': pd.Series(values, dtype=object)})
+
+    try:
+        expected = convert_to_numeric_value_by_value(df.copy(), ['value'])
+    except Exception as ex:
+        with pytest.raises(type(ex)):
+            convert_to_numeric_columns(df.copy(), ['value'])
+        return
+
+    pd.testing.assert_frame_equal(convert_to_numeric_columns(df.copy(), ['value']), expected)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker import HomeBroker, AsyncHomeBroker
+from pyhomebroker.emulator import BrokerEmulator
+
+import asyncio
+import datetime
+
+import pytest
+import requests as rq
+
+# Friday, saturday, sunday and monday, so the chunks of the weekend do not have bars
+FROM_DATE = datetime.date(2024, 4, 5)
+TO_DATE = datetime.date(2024, 4, 9)
+
+@pytest.fixture(scope='module')
+def emulator():
+
+    with BrokerEmulator() as emu:
+        yield emu
+
+def test_iter_intraday_history_skips_chunks_without_data(emulator):
+
+    hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1', calendar=False)
+    hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+    chunks = list(hb.history.iter_intraday_history('GGAL', FROM_DATE, TO_DATE, chunk_days=1))
+    expected = hb.history.get_intraday_history('GGAL', FROM_DATE, TO_DATE)
+
+    assert [chunk.date.iloc[0].date() for chunk in chunks] == [FROM_DATE, datetime.date(2024, 4, 8)]
+    assert sum(len(chunk) for chunk in chunks) == len(expected)
+
+def test_async_iter_intraday_history_skips_chunks_without_data(emulator):
+
+    async def download():
+        hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1', calendar=False)
+        await hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+        try:
+            return [chunk async for chunk in hb.history.iter_intraday_history('GGAL', FROM_DATE, TO_DATE, chunk_days=1)]
+        finally:
+            await hb.auth.close()
+
+    chunks = asyncio.run(download())
+
+    assert [chunk.date.iloc[0].date() for chunk in chunks] == [FROM_DATE, datetime.date(2024, 4, 8)]
+
+def test_history_cache_downloads_only_the_gaps(emulator, tmp_path):
+
+    hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1', history_cache=str(tmp_path / 'history.db'))
+    hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+    def download(home_broker, from_date, to_date):
+        hits = emulator.get_hits().get('/Intradiario/history', 0)
+        df = home_broker.history.get_intraday_history('CACHED', from_date, to_date, chunk_days=1)
+
+        return df, emulator.get_hits().get('/Intradiario/history', 0) - hits
+
+    _, first_hits = download(hb, datetime.date(2024, 4, 8), TO_DATE)
+    _, cached_hits = download(hb, datetime.date(2024, 4, 8), TO_DATE)
+    df, gap_hits = download(hb, FROM_DATE, TO_DATE)
+
+    uncached = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+    uncached.auth.login(1, 'user', 'password', raise_exception=True)
+    expected, total_hits = download(uncached, FROM_DATE, TO_DATE)
+
+    # Only the days before the range already downloaded are requested
+    assert first_hits > 0
+    assert cached_hits == 0
+    assert gap_hits == total_hits - first_hits
+    assert df.equals(expected)
+
+def test_deadline_is_shared_by_the_requests():
+
+    with BrokerEmulator(board_size=5, options_size=5, latency=0.2) as emulator:
+        hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1', calendar=False)
+        hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+        assert len(hb.history.get_daily_history('GGAL', FROM_DATE, TO_DATE, deadline=5))
+
+        # The windows are downloaded one at a time, so the second one exceeds the deadline
+        with pytest.raises(rq.exceptions.Timeout):
+            hb.history.get_intraday_history('GGAL', FROM_DATE, TO_DATE, chunk_days=1, max_workers=1, deadline=0.3)
+
+def test_async_deadline_cancels_the_requests():
+
+    with BrokerEmulator(board_size=5, options_size=5, latency=0.2) as emulator:
+        async def download():
+            hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+            await hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+            try:
+                assert len(await hb.online.get_market_snapshot(deadline=5))
+
+                with pytest.raises(asyncio.TimeoutError):
+                    await hb.online.get_market_snapshot(deadline=0.1)
+            finally:
+                await hb.auth.close()
+
+        asyncio.run(download())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker import MarketCalendar
+
+import datetime
+
+import pytest
+
+def test_holidays_of_2024():
+
+    holidays = [datetime.date(2024, month, day) for month, day in [
+        (1, 1),
+        (2, 12), (2, 13),           # Carnival (easter on march 31)
+        (3, 24),
+        (3, 28), (3, 29),           # Holy thursday and good friday
+        (4, 2), (5, 1), (5, 25),
+        (6, 17),                    # Monday, it is not moved
+        (6, 20), (7, 9),
+        (8, 17), (10, 12),          # Saturday, they are not moved
+        (11, 18),                   # Wednesday november 20 moved to the previous monday
+        (12, 8), (12, 25)]]
+
+    assert MarketCalendar().get_holidays(2024) == holidays
+
+@pytest.mark.parametrize('holiday, moved', [
+    (datetime.date(2024, 11, 20), datetime.date(2024, 11, 18)),     # Wednesday
+    (datetime.date(2027, 8, 17), datetime.date(2027, 8, 16)),       # Tuesday
+    (datetime.date(2023, 10, 12), datetime.date(2023, 10, 16)),     # Thursday
+    (datetime.date(2025, 6, 17), datetime.date(2025, 6, 16)),       # Tuesday
+    (datetime.date(2026, 11, 20), datetime.date(2026, 11, 23))])    # Friday
+def test_movable_holidays(holiday, moved):
+
+    calendar = MarketCalendar()
+
+    assert calendar.is_trading_day(holiday)
+    assert not calendar.is_trading_day(moved)
+
+def test_trading_days_around_easter_2024():
+
+    calendar = MarketCalendar()
+
+    assert calendar.get_trading_days(datetime.date(2024, 3, 25), datetime.date(2024, 4, 5)) == [
+        datetime.date(2024, 3, 25), datetime.date(2024, 3, 26), datetime.date(2024, 3, 27),
+        datetime.date(2024, 4, 1), datetime.date(2024, 4, 3), datetime.date(2024, 4, 4), datetime.date(2024, 4, 5)]
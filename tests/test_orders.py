@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker import HomeBroker, AsyncHomeBroker
+from pyhomebroker.common import DataException
+from pyhomebroker.emulator import BrokerEmulator
+
+import asyncio
+
+import pytest
+
+@pytest.fixture(scope='module')
+def emulator():
+
+    with BrokerEmulator(board_size=5, options_size=5) as emu:
+        yield emu
+
+def test_order_flow(emulator):
+
+    hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+    hb.auth.login(1, 'orders', 'password', raise_exception=True)
+
+    order_number = hb.orders.send_buy_order('GGAL', '24hs', 100.5, 10)
+
+    order = hb.orders.get_orders_status('1').loc[int(order_number)]
+    assert (order.symbol, order.operation_type, order['size'], order.price, order.cancellable) == ('GGAL', 'BUY', 10, 100.5, True)
+
+    hb.orders.cancel_order('1', order_number)
+
+    assert not hb.orders.get_orders_status('1').loc[int(order_number)].cancellable
+
+    with pytest.raises(DataException):
+        hb.orders.cancel_order('1', order_number)
+
+def test_async_order_flow(emulator):
+
+    async def send():
+        hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+        await hb.auth.login(1, 'async_orders', 'password', raise_exception=True)
+
+        try:
+            order_number = await hb.orders.send_sell_order('GGAL', '24hs', 99.75, 5)
+            await hb.orders.cancel_order('1', order_number)
+
+            return order_number, await hb.orders.get_orders_status('1')
+        finally:
+            await hb.auth.close()
+
+    order_number, orders = asyncio.run(send())
+    order = orders.loc[int(order_number)]
+
+    assert (order.symbol, order.operation_type, order['size'], order.price, order.cancellable) == ('GGAL', 'SELL', 5, 99.75, False)
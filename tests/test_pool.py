@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker import HomeBrokerPool
+from pyhomebroker.emulator import BrokerEmulator
+
+def test_ipaddress_error_is_recorded_in_the_results():
+
+    with BrokerEmulator(board_size=5, options_size=5) as emulator:
+        # The public ip lookup (and every login) fails through a proxy that refuses the connections
+        with HomeBrokerPool(proxy_url='http://127.0.0.1:9', timeout=1) as pool:
+            key = pool.add_account(emulator.broker_id, 1, 'user', 'password')
+
+            assert pool.login() == {key: False}
+
+def test_check_health_retries_the_failed_logins():
+
+    with BrokerEmulator(board_size=5, options_size=5, users={(1, 'user'): 'password'}) as emulator:
+        with HomeBrokerPool(ipaddress='127.0.0.1') as pool:
+            valid = pool.add_account(emulator.broker_id, 1, 'user', 'password')
+            invalid = pool.add_account(emulator.broker_id, 2, 'user', 'password')
+
+            assert pool.login() == {valid: True, invalid: False}
+
+            emulator.users[(2, 'user')] = 'password'
+
+            assert pool.check_health() == {valid: True, invalid: True}
+            assert pool[invalid].auth.is_user_logged_in
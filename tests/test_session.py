@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Home Broker API - Market data downloader
+# https://github.com/crapher/pyhomebroker.git
+#
+# Copyright 2020 Diego Degese
+#
+# Licensed under the Apache License, Version 2.0 (the 'License');
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an 'AS IS' BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from pyhomebroker import HomeBroker, AsyncHomeBroker, RateLimiter, RequestScheduler, HedgePolicy
+from pyhomebroker.common import PRIORITY_ORDERS, PRIORITY_ORDERS_STATUS, PRIORITY_MARKET_DATA, PRIORITY_HISTORY, SessionException
+from pyhomebroker.emulator import BrokerEmulator
+
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import time
+
+import pytest
+
+@pytest.fixture(scope='module')
+def emulator():
+
+    with BrokerEmulator(board_size=5, options_size=5) as emu:
+        yield emu
+
+def login(emulator, **kwargs):
+
+    hb = HomeBroker(emulator.broker_id, ipaddress='127.0.0.1', **kwargs)
+    hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+    return hb
+
+@pytest.mark.parametrize('http2', [False, True])
+@pytest.mark.parametrize('restored', [False, True])
+def test_renewed_cookie_replaces_the_old_one(emulator, tmp_path, http2, restored):
+
+    session_store = str(tmp_path / 'sessions.json')
+
+    if restored:
+        login(emulator, session_store=session_store)
+
+    # Without relogin, a stale cookie sent before the renewed one fails the request
+    hb = login(emulator, session_store=session_store, http2=http2, relogin=False)
+    emulator.renew_sessions()
+
+    for _ in range(2):
+        hb.orders.get_orders_status('1')
+
+    assert hb.auth.check_session()
+
+def test_async_renewed_cookie_replaces_the_old_one(emulator, tmp_path):
+
+    session_store = str(tmp_path / 'sessions.json')
+
+    async def renew():
+        for _ in range(2):
+            hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1', session_store=session_store, relogin=False)
+            await hb.auth.login(1, 'user', 'password', raise_exception=True)
+            emulator.renew_sessions()
+
+            try:
+                for _ in range(2):
+                    await hb.orders.get_orders_status('1')
+            finally:
+                await hb.auth.close()
+
+    asyncio.run(renew())
+
+def test_async_requests_use_the_rate_limiter_and_the_scheduler(emulator):
+
+    rate_limiter = RateLimiter(rate=10, burst=1)
+
+    async def get_orders_status():
+        hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1', rate_limiter=rate_limiter)
+        await hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+        try:
+            start = time.monotonic()
+            await asyncio.gather(*[hb.orders.get_orders_status(str(account)) for account in range(5)])
+
+            return time.monotonic() - start, hb.auth.scheduler.get_stats()
+        finally:
+            await hb.auth.close()
+
+    elapsed, stats = asyncio.run(get_orders_status())
+
+    # The bucket admits one request every 0.1 seconds
+    assert elapsed >= 0.35
+    assert rate_limiter.get_stats()['requests'] == 5
+    assert stats['requests'][PRIORITY_ORDERS_STATUS] == 5
+    assert stats['in_flight'] == 0
+
+def test_async_scheduler_sends_higher_priority_first():
+
+    scheduler = RequestScheduler(max_concurrency=3, reserved=1)
+
+    async def schedule():
+        sent = []
+
+        async def send(priority):
+            await scheduler.acquire_async(priority)
+            sent.append(priority)
+
+        for _ in range(2):
+            await scheduler.acquire_async(PRIORITY_MARKET_DATA)
+
+        # The reserved connection is only available for orders
+        assert not await scheduler.acquire_async(PRIORITY_HISTORY, timeout=0.05)
+        assert await scheduler.acquire_async(PRIORITY_ORDERS, timeout=0.05)
+
+        tasks = [asyncio.ensure_future(send(priority)) for priority in (PRIORITY_HISTORY, PRIORITY_ORDERS_STATUS)]
+        await asyncio.sleep(0.05)
+
+        # The orders request and one market data request are completed
+        scheduler.release()
+        scheduler.release()
+        await asyncio.sleep(0.05)
+        assert sent == [PRIORITY_ORDERS_STATUS]
+
+        # A cancelled request leaves the queue without being sent
+        tasks[0].cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        return sent
+
+    assert asyncio.run(schedule()) == [PRIORITY_ORDERS_STATUS]
+    assert scheduler.get_stats()['waiting'] == [0, 0, 0, 0]
+
+def test_relogin_replays_only_the_idempotent_requests(emulator):
+
+    hb = login(emulator)
+    orders = len(hb.orders.get_orders_status('1'))
+
+    emulator.expire_sessions()
+
+    # The orders depend on the state of the expired session, so the session is renewed but the order is not sent
+    with pytest.raises(SessionException):
+        hb.orders.send_buy_order('GGAL', '24hs', 100.0, 10)
+
+    assert hb.auth.is_user_logged_in
+    assert len(hb.orders.get_orders_status('1')) == orders
+
+    emulator.expire_sessions()
+
+    assert len(hb.orders.get_orders_status('1')) == orders
+    assert hb.orders.send_buy_order('GGAL', '24hs', 100.0, 10)
+
+def test_async_relogin_replays_only_the_idempotent_requests(emulator):
+
+    async def renew():
+        hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+        await hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+        try:
+            orders = len(await hb.orders.get_orders_status('1'))
+
+            emulator.expire_sessions()
+
+            with pytest.raises(SessionException):
+                await hb.orders.send_buy_order('GGAL', '24hs', 100.0, 10)
+
+            emulator.expire_sessions()
+
+            assert len(await hb.orders.get_orders_status('1')) == orders
+            assert hb.auth.is_user_logged_in
+        finally:
+            await hb.auth.close()
+
+    asyncio.run(renew())
+
+def test_identical_requests_are_coalesced():
+
+    with BrokerEmulator(board_size=5, options_size=5, latency=0.1) as emulator:
+        hb = login(emulator)
+
+        with ThreadPoolExecutor(5) as executor:
+            results = list(executor.map(lambda _: hb.orders.get_orders_status('1'), range(5)))
+
+        async def get_orders_status():
+            hb = AsyncHomeBroker(emulator.broker_id, ipaddress='127.0.0.1')
+            await hb.auth.login(1, 'user', 'password', raise_exception=True)
+
+            try:
+                return await asyncio.gather(*[hb.orders.get_orders_status('1') for _ in range(5)])
+            finally:
+                await hb.auth.close()
+
+        async_results = asyncio.run(get_orders_status())
+
+        assert emulator.get_hits()['/Consultas/GetConsulta'] == 2
+        assert all(result.equals(results[0]) for result in results + async_results)
+
+def test_hedged_requests_abandon_the_slower_one():
+
+    with BrokerEmulator(board_size=5, options_size=5, latency=(0.01, 0.1), seed=1) as emulator:
+        hedge = HedgePolicy(percentile=50, max_extra_load=1, min_samples=5)
+        hb = login(emulator, hedge=hedge, rate_limiter=RateLimiter(rate=1000, max_concurrency=100))
+
+        for account in range(20):
+            hb.orders.get_orders_status(str(account))
+
+        assert hedge.get_stats()['hedged'] > 0
+
+        # The slower requests complete in background and release the scheduler and the limiter
+        time.sleep(0.5)
+
+        assert hb.auth.scheduler.get_stats()['in_flight'] == 0
+        assert hb.auth.rate_limiter.get_stats()['in_flight'] == 0
+
+def test_session_store_restores_the_session(tmp_path):
+
+    session_store = str(tmp_path / 'sessions.json')
+
+    with BrokerEmulator(board_size=5, options_size=5) as emulator:
+        login(emulator, session_store=session_store)
+        hb = login(emulator, session_store=session_store)
+
+        assert emulator.get_hits()['/Login/Ingresar'] == 1
+        assert len(hb.orders.get_orders_status('1'))
+
+        # An expired stored session performs a full login
+        emulator.expire_sessions()
+        hb = login(emulator, session_store=session_store)
+
+        assert emulator.get_hits()['/Login/Ingresar'] == 2
+        assert hb.auth.check_session()